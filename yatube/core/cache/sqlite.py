@@ -0,0 +1,248 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.metrics import record_cache
+from core.tracing import cache_operation
+
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS cache ('
+    ' key TEXT PRIMARY KEY,'
+    ' value BLOB NOT NULL,'
+    ' size INTEGER NOT NULL,'
+    ' expires REAL,'
+    ' accessed REAL NOT NULL'
+    ') WITHOUT ROWID',
+    'CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)',
+    'CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)',
+    # Число и размер записей ведут триггеры, чтобы не считать их заново
+    # при каждой записи
+    'CREATE TABLE IF NOT EXISTS cache_stats ('
+    ' id INTEGER PRIMARY KEY CHECK (id = 0),'
+    ' entries INTEGER NOT NULL,'
+    ' size INTEGER NOT NULL)',
+    'INSERT OR IGNORE INTO cache_stats VALUES (0, 0, 0)',
+    'CREATE TRIGGER IF NOT EXISTS cache_inserted AFTER INSERT ON cache '
+    'BEGIN UPDATE cache_stats SET entries = entries + 1, '
+    'size = size + NEW.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_updated AFTER UPDATE OF size '
+    'ON cache BEGIN UPDATE cache_stats SET '
+    'size = size + NEW.size - OLD.size; END',
+    'CREATE TRIGGER IF NOT EXISTS cache_deleted AFTER DELETE ON cache '
+    'BEGIN UPDATE cache_stats SET entries = entries - 1, '
+    'size = size - OLD.size; END',
+)
+UPSERT = (
+    'INSERT INTO cache (key, value, size, expires, accessed) '
+    'VALUES (?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET '
+    'value = excluded.value, size = excluded.size, '
+    'expires = excluded.expires, accessed = excluded.accessed'
+)
+PRAGMAS = (
+    'PRAGMA journal_mode = wal',
+    'PRAGMA synchronous = normal',
+    'PRAGMA busy_timeout = 5000',
+)
+# Время последнего чтения обновляется не чаще, чем раз в столько секунд
+ACCESS_RESOLUTION = 1
+LIVE = '(expires IS NULL OR expires > ?)'
+
+
+class SQLiteCache(BaseCache):
+    """Кеш в файле SQLite, общий для всех процессов на одной машине.
+
+    Файл открыт в режиме WAL: чтения не ждут записей. Записи вытесняются
+    по давности последнего чтения, когда их больше MAX_ENTRIES или их
+    общий размер больше OPTIONS['MAX_SIZE']. add и incr атомарны и между
+    процессами.
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.location = location
+        options = params.get('OPTIONS', {})
+        self._max_size = options.get('MAX_SIZE')
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        """Соединение своё у каждого потока и у каждого процесса после fork."""
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            directory = os.path.dirname(self.location)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(
+                self.location, timeout=5, isolation_level=None,
+                check_same_thread=False
+            )
+            for statement in PRAGMAS + SCHEMA:
+                db.execute(statement)
+            local.db = db
+            local.pid = os.getpid()
+        return local.db
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _dump(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    @cache_operation
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        data = self._dump(value)
+        now = time.time()
+        cursor = self._db.execute(
+            UPSERT + ' WHERE cache.expires IS NOT NULL '
+            'AND cache.expires <= ?',
+            (key, data, len(data), self.get_backend_timeout(timeout), now,
+             now)
+        )
+        added = cursor.rowcount == 1
+        if added:
+            self._cull()
+        return added
+
+    @cache_operation
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        row = self._db.execute(
+            f'SELECT value, accessed FROM cache WHERE key = ? AND {LIVE}',
+            (key, now)
+        ).fetchone()
+        record_cache(row is not None)
+        if row is None:
+            return default
+        value, accessed = row
+        if now - accessed > ACCESS_RESOLUTION:
+            self._db.execute(
+                'UPDATE cache SET accessed = ? WHERE key = ?', (now, key)
+            )
+        return pickle.loads(value)
+
+    @cache_operation
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        data = self._dump(value)
+        self._db.execute(
+            UPSERT,
+            (key, data, len(data), self.get_backend_timeout(timeout),
+             time.time())
+        )
+        self._cull()
+
+    @cache_operation
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        cursor = self._db.execute(
+            f'UPDATE cache SET expires = ? WHERE key = ? AND {LIVE}',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount == 1
+
+    @cache_operation
+    def delete(self, key, version=None):
+        key = self._key(key, version)
+        self._db.execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    @cache_operation
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._db.execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}',
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    @cache_operation
+    def incr(self, key, delta=1, version=None):
+        """Читает и пишет значение в одной транзакции BEGIN IMMEDIATE."""
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {LIVE}',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            data = self._dump(value)
+            db.execute(
+                'UPDATE cache SET value = ?, size = ? WHERE key = ?',
+                (data, len(data), key)
+            )
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def disconnect(self):
+        """Закрывает соединение потока, например перед fork.
+
+        Дочерний процесс не должен пользоваться файлом SQLite, открытым
+        в родителе: блокировки файла у них общие.
+        """
+        db = getattr(self._local, 'db', None)
+        if db is not None:
+            db.close()
+        self._local.db = self._local.pid = None
+
+    def close(self, **kwargs):
+        # Соединение живёт весь процесс: открывать файл на каждый запрос
+        # дороже, чем держать его
+        pass
+
+    def _stats(self):
+        return self._db.execute(
+            'SELECT entries, size FROM cache_stats'
+        ).fetchone()
+
+    def _cull(self):
+        """Удаляет просроченные записи, затем давно не читанные."""
+        db = self._db
+        count, size = self._stats()
+        over_size = self._max_size is not None and size > self._max_size
+        if count <= self._max_entries and not over_size:
+            return
+        db.execute(
+            'DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?',
+            (time.time(),)
+        )
+        count, size = self._stats()
+        if count > self._max_entries:
+            # Как у встроенных бэкендов: удаляется 1/CULL_FREQUENCY записей
+            limit = max(count // self._cull_frequency, 1)
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+                (limit,)
+            )
+            count, size = self._stats()
+        if self._max_size is not None and size > self._max_size:
+            db.execute(
+                'DELETE FROM cache WHERE key IN ('
+                ' SELECT key FROM cache WHERE accessed <= ('
+                '  SELECT accessed FROM ('
+                '   SELECT accessed, SUM(size) OVER ('
+                '    ORDER BY accessed ROWS UNBOUNDED PRECEDING) AS total'
+                '   FROM cache)'
+                '  WHERE total >= ? ORDER BY accessed LIMIT 1))',
+                (size - self._max_size,)
+            )
@@ -0,0 +1,88 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube.settings import DATABASE_REPLICA_MODELS, DATABASE_REPLICAS
+
+
+# Читать с основной базы: пользователь недавно писал
+_pinned = ContextVar('replica_pinned', default=False)
+# В текущем запросе уже была запись; None — вне запроса
+_written = ContextVar('replica_written', default=None)
+# Реплика, с которой читает весь текущий запрос
+_replica = ContextVar('replica_alias', default=None)
+
+
+@contextmanager
+def use_primary():
+    """Все чтения внутри блока идут в основную базу."""
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+@contextmanager
+def track_writes(pinned=False):
+    """Отмечает границы запроса; отдаёт функцию «была ли запись».
+
+    Весь запрос читает с одной реплики: версии кэша и данные страницы
+    должны быть из одного снимка.
+    """
+    pinned_token = _pinned.set(pinned)
+    written_token = _written.set(False)
+    replica_token = _replica.set(
+        random.choice(DATABASE_REPLICAS) if DATABASE_REPLICAS else None
+    )
+    try:
+        yield _written.get
+    finally:
+        _replica.reset(replica_token)
+        _written.reset(written_token)
+        _pinned.reset(pinned_token)
+
+
+class ReplicaRouter:
+    """Чтение контента с реплик, запись в основную базу.
+
+    С основной базы читается всё внутри транзакции, всё после записи
+    контента в том же запросе и всё, пока действует метка из
+    ReplicaPinMiddleware, поэтому пользователь сразу видит свои
+    изменения. Запись сессий и last_login реплики не касается.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not DATABASE_REPLICAS:
+            return None
+        if model._meta.label not in DATABASE_REPLICA_MODELS:
+            return None
+        if _pinned.get() or _written.get():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return _replica.get() or random.choice(DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        if (
+            _written.get() is not None
+            and model._meta.label in DATABASE_REPLICA_MODELS
+        ):
+            _written.set(True)
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in DATABASE_REPLICAS:
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in DATABASE_REPLICAS:
+            return False
+        return None
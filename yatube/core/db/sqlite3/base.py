@@ -0,0 +1,45 @@
+from django.db.backends.sqlite3 import base
+
+
+# Значения по умолчанию; переопределяются в OPTIONS['pragmas'].
+PRAGMAS = {
+    # Читатели не ждут писателя, писатель не ждёт читателей
+    'journal_mode': 'wal',
+    # В режиме WAL fsync нужен только на контрольной точке
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в КиБ, а не в страницах
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite для нескольких процессов gunicorn.
+
+    Каждое новое соединение получает прагмы из PRAGMAS. Транзакции
+    начинаются с BEGIN IMMEDIATE: отложенная транзакция, которая сначала
+    читает, а потом пишет, получает `database is locked` сразу, не
+    дожидаясь busy_timeout. Режим задаётся OPTIONS['transaction_mode'].
+    """
+
+    pragmas = PRAGMAS
+    transaction_mode = 'IMMEDIATE'
+
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **kwargs.pop('pragmas', {})}
+        self.transaction_mode = kwargs.pop(
+            'transaction_mode', self.transaction_mode
+        )
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
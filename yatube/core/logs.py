@@ -0,0 +1,136 @@
+import heapq
+import json
+import logging
+import os
+import threading
+from logging.handlers import RotatingFileHandler
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_file(name):
+    with open(name, encoding='utf-8') as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class JSONLog:
+    """Журнал JSONL с ротацией по размеру.
+
+    Ротация RotatingFileHandler безопасна только для одного процесса,
+    поэтому каждый процесс пишет свой файл `<имя>.<pid>.jsonl` рядом
+    с настроенным путём и сам его ротирует. Из файлов завершившихся
+    процессов хранятся только backup_count последних.
+
+    Путь и размеры читаются функцией options при каждой записи,
+    поэтому журнал следует за настройками, изменёнными в тестах.
+    По key записи разных процессов сливаются в порядке времени.
+    """
+
+    def __init__(self, name, options, key):
+        self.logger = logging.getLogger(name)
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.options = options
+        self.key = key
+        self._lock = threading.Lock()
+        self._target = None
+
+    @staticmethod
+    def _process_path(path, pid):
+        root, extension = os.path.splitext(path)
+        return f'{root}.{pid}{extension}'
+
+    @staticmethod
+    def _process_files(path):
+        """Файлы процессов журнала path: {pid: путь}."""
+        directory, name = os.path.split(path)
+        root, extension = os.path.splitext(name)
+        files = {}
+        if not os.path.isdir(directory):
+            return files
+        for entry in os.listdir(directory):
+            if not entry.startswith(f'{root}.'):
+                continue
+            pid, _, rest = entry[len(root) + 1:].partition('.')
+            if pid.isdigit() and rest == extension[1:]:
+                files[int(pid)] = os.path.join(directory, entry)
+        return files
+
+    def _prune(self, path, backup_count):
+        """Удаляет старые файлы завершившихся процессов."""
+        dead = []
+        for pid, name in self._process_files(path).items():
+            if pid_alive(pid):
+                continue
+            try:
+                dead.append((os.path.getmtime(name), name))
+            except FileNotFoundError:
+                # Его уже удалил другой процесс
+                continue
+        dead.sort(reverse=True)
+        for _, name in dead[backup_count:]:
+            for old in [name, *self._rotated(name, backup_count)]:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _rotated(name, backup_count):
+        return [f'{name}.{number}' for number in range(backup_count, 0, -1)]
+
+    def _get_logger(self):
+        path, max_bytes, backup_count = self.options()
+        # После fork у процесса новый pid и должен быть свой файл
+        target = (path, os.getpid())
+        with self._lock:
+            if target != self._target:
+                for handler in self.logger.handlers[:]:
+                    self.logger.removeHandler(handler)
+                    handler.close()
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                self._prune(path, backup_count)
+                handler = RotatingFileHandler(
+                    self._process_path(*target),
+                    maxBytes=max_bytes,
+                    backupCount=backup_count,
+                    encoding='utf-8',
+                    delay=True,
+                )
+                handler.setFormatter(logging.Formatter('%(message)s'))
+                self.logger.addHandler(handler)
+                self._target = target
+        return self.logger
+
+    def write(self, entry):
+        self._get_logger().info(json.dumps(entry, ensure_ascii=False))
+
+    def _read_process(self, name, backup_count):
+        """Записи одного файла вместе с ротированными, от старых к новым."""
+        for path in [*self._rotated(name, backup_count), name]:
+            if os.path.exists(path):
+                yield from _read_file(path)
+
+    def read(self, path=None):
+        """Записи всех процессов, слитые по времени, от старых к новым."""
+        default, _, backup_count = self.options()
+        path = path or default
+        names = list(self._process_files(path).values())
+        # Путь из --file может указывать и на файл одного процесса
+        names.append(path)
+        return heapq.merge(
+            *(self._read_process(name, backup_count) for name in names),
+            key=self.key
+        )
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+
+BACKENDS = (
+    ('locmem', 'django.core.cache.backends.locmem.LocMemCache'),
+    ('filebased', 'django.core.cache.backends.filebased.FileBasedCache'),
+    ('sqlite', 'core.cache.sqlite.SQLiteCache'),
+)
+OPERATIONS = ('set', 'get', 'incr')
+
+
+def make_cache(backend, location, entries):
+    return import_string(backend)(
+        location, {'OPTIONS': {'MAX_ENTRIES': entries * 2}}
+    )
+
+
+def run_operations(backend, location, keys, value, entries):
+    """Время каждой операции по всем ключам, в секундах."""
+    cache = make_cache(backend, location, entries)
+    timings = {}
+    start = time.perf_counter()
+    for key in keys:
+        cache.set(key, value)
+    timings['set'] = time.perf_counter() - start
+    start = time.perf_counter()
+    hits = sum(cache.get(key) is not None for key in keys)
+    timings['get'] = time.perf_counter() - start
+    cache.set('counter', 0)
+    start = time.perf_counter()
+    for _ in keys:
+        cache.incr('counter')
+    timings['incr'] = time.perf_counter() - start
+    return timings, hits
+
+
+def run_worker(args):
+    return run_operations(*args)
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает бэкенды кеша: операции в секунду и общие попадания'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keys', type=int, default=2000)
+        parser.add_argument('--size', type=int, default=2048)
+        parser.add_argument(
+            '--processes', type=int, default=1,
+            help='Число процессов; каждый пишет свою долю ключей'
+        )
+
+    def handle(self, *args, **options):
+        value = 'x' * options['size']
+        processes = options['processes']
+        self.stdout.write(
+            f'{"бэкенд":<12}'
+            + ''.join(f'{name:>12}' for name in OPERATIONS)
+            + f'{"попадания":>12}'
+        )
+        for name, backend in BACKENDS:
+            directory = tempfile.mkdtemp()
+            location = os.path.join(directory, 'cache.sqlite3')
+            if name == 'filebased':
+                location = directory
+            try:
+                rates, hits = self.measure(
+                    backend, location, options['keys'], value, processes
+                )
+            finally:
+                shutil.rmtree(directory, ignore_errors=True)
+            self.stdout.write(
+                f'{name:<12}'
+                + ''.join(f'{rates[op]:>12.0f}' for op in OPERATIONS)
+                + f'{hits:>12.0%}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Операций в секунду на все процессы; попадания — доля ключей '
+            'всех процессов, видимых из нового экземпляра кеша'
+        ))
+
+    def measure(self, backend, location, count, value, processes):
+        keys = [f'key{number}' for number in range(count)]
+        chunks = [keys[start::processes] for start in range(processes)]
+        if processes == 1:
+            results = [
+                run_operations(backend, location, keys, value, count)
+            ]
+        else:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(processes) as pool:
+                results = pool.map(run_worker, [
+                    (backend, location, chunk, value, count)
+                    for chunk in chunks
+                ])
+        rates = {
+            op: count / max(timings[op] for timings, _ in results)
+            for op in OPERATIONS
+        }
+        # Что увидит другой процесс: у LocMemCache — ничего
+        reader = make_cache(backend, location, count)
+        if 'locmem' in backend:
+            reader = make_cache(backend, f'{location}-reader', count)
+        hits = sum(reader.get(key) is not None for key in keys) / count
+        return rates, hits
@@ -0,0 +1,130 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.tracing import attribute_value, read_traces
+
+
+# Атрибут, который показывается рядом с именем спана
+DETAILS = ('db.statement', 'cache.key', 'http.target')
+DETAIL_LENGTH = 60
+
+
+def span_time(span):
+    return int(span['startTimeUnixNano']), int(span['endTimeUnixNano'])
+
+
+def duration(span):
+    start, end = span_time(span)
+    return (end - start) / 1e6
+
+
+class Command(BaseCommand):
+    help = 'Показывает трассу запроса: дерево спанов с их временем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'trace_id', nargs='?',
+            help='Трасса или начало её id; без него — список трасс'
+        )
+        parser.add_argument(
+            '--file', default=None,
+            help=(
+                'Журнал; по умолчанию TRACE_FILE: файлы всех процессов '
+                'с ротированными копиями'
+            )
+        )
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--slowest', action='store_true',
+            help='Показать самую долгую трассу'
+        )
+        parser.add_argument(
+            '--min-ms', type=float, default=0,
+            help='Скрыть спаны короче этого времени'
+        )
+        parser.add_argument('--width', type=int, default=40)
+
+    def handle(self, *args, **options):
+        traces = list(read_traces(options['file']))
+        if not traces:
+            raise CommandError('В журнале нет трасс')
+        if options['slowest']:
+            self.show(max(
+                traces, key=lambda trace: duration(trace[1][0])
+            ), options)
+        elif options['trace_id']:
+            found = [
+                trace for trace in traces
+                if trace[0].startswith(options['trace_id'])
+            ]
+            if not found:
+                raise CommandError(f'Трасса {options["trace_id"]} не найдена')
+            self.show(found[-1], options)
+        else:
+            self.list_traces(traces[-options['limit']:])
+            return
+        self.stdout.write(self.style.SUCCESS('Готово'))
+
+    def list_traces(self, traces):
+        for trace_id, spans in reversed(traces):
+            self.stdout.write(
+                f'{trace_id}  {duration(spans[0]):>9.1f}мс'
+                f'{len(spans):>6}  {spans[0]["name"]}'
+            )
+
+    def show(self, trace, options):
+        trace_id, spans = trace
+        children = defaultdict(list)
+        for span in spans:
+            children[span.get('parentSpanId')].append(span)
+        for group in children.values():
+            group.sort(key=span_time)
+        root = spans[0]
+        root_start, root_end = span_time(root)
+        scale = options['width'] / max(root_end - root_start, 1)
+        self.stdout.write(f'Трасса {trace_id}')
+        self.stdout.write(
+            f'{"начало":>9}{"всего":>9}{"своё":>9}  {"":<{options["width"]}}'
+            f'  спан'
+        )
+        own = defaultdict(float)
+
+        def walk(span, depth):
+            start, end = span_time(span)
+            total = duration(span)
+            self_ms = total - sum(
+                duration(child) for child in children[span['spanId']]
+            )
+            own[span['name']] += self_ms
+            if total >= options['min_ms']:
+                offset = int((start - root_start) * scale)
+                length = max(1, round((end - start) * scale))
+                bar = (' ' * offset + '█' * length)[:options['width']]
+                self.stdout.write(
+                    f'{(start - root_start) / 1e6:>9.1f}{total:>9.1f}'
+                    f'{self_ms:>9.1f}  {bar:<{options["width"]}}  '
+                    f'{"  " * depth}{span["name"]}{self.detail(span)}'
+                )
+            for child in children[span['spanId']]:
+                walk(child, depth + 1)
+
+        walk(root, 0)
+        self.stdout.write('\nСобственное время по спанам:')
+        for name, total in sorted(
+            own.items(), key=lambda item: item[1], reverse=True
+        ):
+            self.stdout.write(f'{total:>9.1f}мс  {name}')
+
+    def detail(self, span):
+        attributes = {
+            attribute['key']: attribute_value(attribute['value'])
+            for attribute in span['attributes']
+        }
+        for key in DETAILS:
+            if key in attributes:
+                value = ' '.join(str(attributes[key]).split())
+                if len(value) > DETAIL_LENGTH:
+                    value = value[:DETAIL_LENGTH] + '…'
+                return f'  [{value}]'
+        return ''
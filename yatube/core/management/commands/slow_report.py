@@ -0,0 +1,77 @@
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.queries import query_shape
+from core.slowlog import read_entries
+
+
+class Command(BaseCommand):
+    help = 'Сводка журнала медленных запросов: худшие страницы и запросы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--file', default=None,
+            help=(
+                'Журнал; по умолчанию SLOWLOG_FILE: файлы всех процессов '
+                'с ротированными копиями'
+            )
+        )
+        parser.add_argument('--top', type=int, default=10)
+        parser.add_argument(
+            '--view', default=None, help='Только запросы этого представления'
+        )
+
+    def handle(self, *args, **options):
+        views = defaultdict(list)
+        shapes = defaultdict(list)
+        origins = defaultdict(Counter)
+        total = 0
+        for entry in read_entries(options['file'] or settings.SLOWLOG_FILE):
+            if options['view'] and entry['view'] != options['view']:
+                continue
+            total += 1
+            views[entry['view']].append(entry)
+            for query in entry['queries']:
+                shape = query_shape(query['sql'])
+                shapes[shape].append(query['time'])
+                if query['stack']:
+                    origin = query['stack'][-1]
+                    if query['template']:
+                        origin += f' ({query["template"]})'
+                    origins[shape][origin] += 1
+        if not total:
+            raise CommandError('В журнале нет записей')
+        top = options['top']
+        self.stdout.write(f'Записей: {total}\n')
+        self.stdout.write(
+            f'{"представление":<28}{"записей":>9}{"среднее":>10}'
+            f'{"макс.":>10}{"SQL":>8}'
+        )
+        ranked = sorted(
+            views.items(),
+            key=lambda item: sum(entry['duration'] for entry in item[1]),
+            reverse=True,
+        )
+        for view, entries in ranked[:top]:
+            durations = [entry['duration'] for entry in entries]
+            queries = sum(len(entry['queries']) for entry in entries)
+            self.stdout.write(
+                f'{view:<28}{len(entries):>9}'
+                f'{sum(durations) / len(durations) * 1000:>8.1f}мс'
+                f'{max(durations) * 1000:>8.1f}мс'
+                f'{queries / len(entries):>8.1f}'
+            )
+        self.stdout.write('\nЗапросы по суммарному времени:')
+        ranked = sorted(
+            shapes.items(), key=lambda item: sum(item[1]), reverse=True
+        )
+        for shape, times in ranked[:top]:
+            self.stdout.write(
+                f'\n{sum(times) * 1000:.1f}мс всего, {len(times)} раз, '
+                f'макс. {max(times) * 1000:.1f}мс\n  {shape}'
+            )
+            for origin, count in origins[shape].most_common(3):
+                self.stdout.write(f'    {count} x {origin}')
+        self.stdout.write(self.style.SUCCESS('Готово'))
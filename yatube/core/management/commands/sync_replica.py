@@ -0,0 +1,32 @@
+import sqlite3
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from yatube.settings import DATABASE_REPLICAS
+
+
+class Command(BaseCommand):
+    help = 'Копирует основную базу SQLite в локальные реплики'
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError(
+                'Копировать можно только SQLite; реплики других СУБД '
+                'настраиваются их собственной репликацией'
+            )
+        if not DATABASE_REPLICAS:
+            raise CommandError('В DATABASE_REPLICAS нет реплик')
+        primary.ensure_connection()
+        for alias in DATABASE_REPLICAS:
+            replica = connections[alias]
+            replica.close()
+            # backup копирует согласованный снимок даже во время записи
+            target = sqlite3.connect(replica.settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: {replica.settings_dict["NAME"]}')
+        self.stdout.write(self.style.SUCCESS('Реплики обновлены'))
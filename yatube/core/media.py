@@ -0,0 +1,146 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """Диапазон начинается за концом файла."""
+
+
+class FileRange:
+    """Часть открытого файла для FileResponse.
+
+    read() не выходит за конец диапазона, а fileno() и tell() дают
+    wsgi.file_wrapper отдать эту часть через os.sendfile.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Первый и последний байт из заголовка Range или None.
+
+    None — заголовок не разобран или задаёт несколько диапазонов;
+    тогда файл отдаётся целиком.
+    """
+    match = RANGE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not size:
+        raise RangeNotSatisfiable
+    if not first:
+        if not int(last):
+            raise RangeNotSatisfiable
+        return max(size - int(last), 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable
+    return start, min(end, size - 1)
+
+
+def _range_allowed(request, etag, last_modified):
+    """If-Range совпадает с текущей версией файла или не задан."""
+    if_range = request.META.get('HTTP_IF_RANGE')
+    return if_range is None or if_range in (etag, last_modified)
+
+
+def _file_response(request, path, size, etag, last_modified, content_type):
+    header = request.META.get('HTTP_RANGE')
+    if header and _range_allowed(request, etag, last_modified):
+        try:
+            span = parse_range(header, size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+        if span is not None:
+            start, end = span
+            response = FileResponse(
+                FileRange(open(path, 'rb'), start, end - start + 1),
+                status=206, content_type=content_type
+            )
+            response['Content-Length'] = end - start + 1
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            return response
+    return FileResponse(open(path, 'rb'), content_type=content_type)
+
+
+def serve(request, name):
+    """Отдаёт файл из MEDIA_ROOT.
+
+    Поддерживает ETag, Last-Modified и один диапазон Range. С
+    MEDIA_SENDFILE сам файл отдаёт веб-сервер по X-Accel-Redirect
+    или X-Sendfile, и процесс Django сразу освобождается.
+    """
+    try:
+        path = safe_join(settings.MEDIA_ROOT, name)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(path):
+        raise Http404
+    stat = os.stat(path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = http_date(stat.st_mtime)
+    content_type = (
+        mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    )
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        mode = settings.MEDIA_SENDFILE
+        if mode == 'x-accel-redirect':
+            response = HttpResponse(content_type=content_type)
+            response['X-Accel-Redirect'] = quote(
+                settings.MEDIA_ACCEL_PREFIX + os.path.relpath(
+                    path, settings.MEDIA_ROOT
+                ).replace(os.sep, '/')
+            )
+        elif mode == 'x-sendfile':
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            response = _file_response(
+                request, path, stat.st_size, etag, last_modified,
+                content_type
+            )
+            response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
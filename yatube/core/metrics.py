@@ -0,0 +1,367 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates, Template
+
+from .logs import pid_alive
+from .tracing import trace_engine
+
+
+TIME_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время ответа представления', TIME_BUCKETS
+    ),
+    'yatube_request_queries': (
+        'Число SQL-запросов за запрос', COUNT_BUCKETS
+    ),
+    'yatube_request_sql_seconds': (
+        'Время SQL-запросов за запрос', TIME_BUCKETS
+    ),
+    'yatube_template_render_seconds': (
+        'Время отрисовки шаблонов за запрос', TIME_BUCKETS
+    ),
+}
+COUNTERS = {
+    'yatube_requests_total': 'Число запросов',
+    'yatube_cache_requests_total': 'Обращения к кешу',
+    'yatube_lookup_total': 'Поиск групп и авторов по уровням кеша',
+}
+
+# Сведения о текущем запросе, которые дописывают хуки шаблонов и кеша
+_request = ContextVar('metrics_request', default=None)
+
+
+class RequestStats:
+    __slots__ = ('template_seconds', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.template_seconds = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+# Сумма снимков завершившихся процессов
+ARCHIVE = 'archive.json'
+LOCK = 'metrics.lock'
+
+
+@contextmanager
+def _locked(directory, operation):
+    """Блокировка каталога метрик между процессами."""
+    with open(os.path.join(directory, LOCK), 'a') as file:
+        fcntl.flock(file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge(histograms, counters, data):
+    for metric, labels, counts, total, count in data['histograms']:
+        key = (metric, tuple(map(tuple, labels)))
+        merged = histograms.setdefault(key, [[0] * len(counts), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+        merged[2] += count
+    for metric, labels, value in data['counters']:
+        key = (metric, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+
+
+class Registry:
+    """Метрики процесса.
+
+    Запись — сложение чисел под блокировкой. Раз в
+    METRICS_FLUSH_INTERVAL секунд снимок пишется в файл `<pid>.json`
+    в METRICS_DIR; /metrics складывает файлы всех процессов. Файлы
+    завершившихся процессов вливаются в archive.json и удаляются,
+    поэтому каталог не растёт с перезапусками воркеров.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def reset(self):
+        self.pid = os.getpid()
+        self.name = f'{self.pid}.json'
+        self.histograms = {}
+        self.counters = {}
+        self.next_flush = 0
+        # Файл с нашим pid мог остаться от завершившегося процесса
+        self.claimed = False
+
+    def _check_fork(self):
+        # После fork ребёнок не должен повторно сдать числа родителя
+        if os.getpid() != self.pid:
+            self.reset()
+
+    def observe(self, name, labels, value):
+        buckets = HISTOGRAMS[name][1]
+        key = (name, labels)
+        with self._lock:
+            self._check_fork()
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [
+                    [0] * (len(buckets) + 1), 0.0, 0
+                ]
+            counts = histogram[0]
+            for index, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self._check_fork()
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def register_collector(self, collector):
+        """collector() отдаёт тройки (счётчик, метки, значение процесса)."""
+        self._collectors.append(collector)
+
+    def snapshot(self):
+        counters = {}
+        for collector in self._collectors:
+            for name, labels, value in collector():
+                counters[(name, labels)] = value
+        with self._lock:
+            self._check_fork()
+            counters.update(self.counters)
+            return {
+                'histograms': [
+                    [name, labels, counts, total, count]
+                    for (name, labels), (counts, total, count)
+                    in self.histograms.items()
+                ],
+                'counters': [
+                    [name, labels, value]
+                    for (name, labels), value in counters.items()
+                ],
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now < self.next_flush:
+            return
+        self.next_flush = now + settings.METRICS_FLUSH_INTERVAL
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.name)
+        if not self.claimed:
+            with _locked(directory, fcntl.LOCK_EX):
+                self._archive(directory, self.name)
+            self.claimed = True
+        with open(path + '.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(path + '.tmp', path)
+
+    def _archive(self, directory, name):
+        """Вливает файл процесса в архив; вызывать под блокировкой."""
+        path = os.path.join(directory, name)
+        data = _read_snapshot(path)
+        if data is None:
+            return
+        histograms, counters = {}, {}
+        archive = _read_snapshot(os.path.join(directory, ARCHIVE))
+        for snapshot in (archive, data):
+            if snapshot is not None:
+                _merge(histograms, counters, snapshot)
+        temp = os.path.join(directory, ARCHIVE + '.tmp')
+        with open(temp, 'w') as file:
+            json.dump({
+                'histograms': [
+                    [metric, labels, *values]
+                    for (metric, labels), values in histograms.items()
+                ],
+                'counters': [
+                    [metric, labels, value]
+                    for (metric, labels), value in counters.items()
+                ],
+            }, file)
+        os.replace(temp, os.path.join(directory, ARCHIVE))
+        os.remove(path)
+
+    def _dead_files(self, directory):
+        for name in os.listdir(directory):
+            pid, _, extension = name.partition('.')
+            if extension != 'json' or not pid.isdigit():
+                continue
+            if int(pid) != self.pid and not pid_alive(int(pid)):
+                yield name
+
+    def collect(self):
+        """Сумма снимков всех процессов, включая завершившиеся."""
+        self.flush(force=True)
+        histograms = {}
+        counters = {}
+        directory = settings.METRICS_DIR
+        dead = list(self._dead_files(directory))
+        if dead:
+            with _locked(directory, fcntl.LOCK_EX):
+                for name in dead:
+                    self._archive(directory, name)
+        with _locked(directory, fcntl.LOCK_SH):
+            for name in os.listdir(directory):
+                if not name.endswith('.json'):
+                    continue
+                data = _read_snapshot(os.path.join(directory, name))
+                if data is not None:
+                    _merge(histograms, counters, data)
+        return histograms, counters
+
+
+registry = Registry()
+
+
+def _labels(labels, **extra):
+    pairs = [*labels, *extra.items()]
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+         .replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def render_metrics():
+    """Все метрики в текстовом формате Prometheus."""
+    histograms, counters = registry.collect()
+    lines = []
+    for metric, (help_text, buckets) in HISTOGRAMS.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} histogram')
+        for (name, labels), (counts, total, count) in sorted(
+            histograms.items()
+        ):
+            if name != metric:
+                continue
+            cumulative = 0
+            for bound, bucket in zip((*buckets, '+Inf'), counts):
+                cumulative += bucket
+                lines.append(
+                    f'{metric}_bucket{_labels(labels, le=bound)} '
+                    f'{cumulative}'
+                )
+            lines.append(f'{metric}_sum{_labels(labels)} {total}')
+            lines.append(f'{metric}_count{_labels(labels)} {count}')
+    for metric, help_text in COUNTERS.items():
+        lines.append(f'# HELP {metric} {help_text}')
+        lines.append(f'# TYPE {metric} counter')
+        for (name, labels), value in sorted(counters.items()):
+            if name == metric:
+                lines.append(f'{metric}{_labels(labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def record_cache(hit):
+    """Хук бэкенда кеша: попадание или промах в текущем запросе."""
+    stats = _request.get()
+    if stats is None:
+        return
+    if hit:
+        stats.cache_hits += 1
+    else:
+        stats.cache_misses += 1
+
+
+class MetricsTemplate(Template):
+
+    def render(self, context=None, request=None):
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            stats = _request.get()
+            if stats is not None:
+                stats.template_seconds += time.perf_counter() - start
+
+
+class MetricsTemplates(DjangoTemplates):
+    """Шаблоны Django, которые засекают время своей отрисовки.
+
+    Каждый шаблон, включая вложенные, ещё и отдаёт спан в трассу.
+    """
+
+    def __init__(self, params):
+        super().__init__(params)
+        trace_engine(self.engine)
+
+    def from_string(self, template_code):
+        return MetricsTemplate(
+            super().from_string(template_code).template, self
+        )
+
+    def get_template(self, template_name):
+        return MetricsTemplate(
+            super().get_template(template_name).template, self
+        )
+
+
+@contextmanager
+def track_request():
+    """Собирает время шаблонов и обращения к кешу внутри блока."""
+    stats = RequestStats()
+    token = _request.set(stats)
+    try:
+        yield stats
+    finally:
+        _request.reset(token)
+
+
+def current_stats():
+    """Сведения о текущем запросе или None вне track_request."""
+    return _request.get()
+
+
+def record_request(view, status, duration, stats, recorder=None):
+    labels = (('view', view),)
+    registry.observe('yatube_request_duration_seconds', labels, duration)
+    registry.observe(
+        'yatube_template_render_seconds', labels, stats.template_seconds
+    )
+    if recorder is not None:
+        registry.observe('yatube_request_queries', labels, len(recorder))
+        registry.observe(
+            'yatube_request_sql_seconds', labels,
+            sum(query['time'] for query in recorder.queries)
+        )
+    registry.inc('yatube_requests_total', labels + (('status', status),))
+    for result, count in (
+        ('hit', stats.cache_hits), ('miss', stats.cache_misses)
+    ):
+        if count:
+            registry.inc(
+                'yatube_cache_requests_total',
+                labels + (('result', result),),
+                count
+            )
+    registry.flush()
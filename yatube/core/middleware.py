@@ -0,0 +1,157 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metrics, slowlog, staticfiles, tracing
+from .db.router import track_writes
+from .queries import QueryRecorder, check_budget
+from yatube.settings import (
+    DATABASE_REPLICAS, REPLICA_PIN_COOKIE, REPLICA_PIN_SECONDS
+)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы запроса и сверяет их с бюджетом представления."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with QueryRecorder() as recorder:
+            request.query_recorder = recorder
+            response = self.get_response(request)
+        match = request.resolver_match
+        name = match.view_name if match else request.path
+        check_budget(name, recorder, request.query_budget)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+
+class ReplicaPinMiddleware:
+    """После записи отправляет чтения пользователя в основную базу.
+
+    Реплика может отставать, поэтому запрос с записью ставит куку
+    на REPLICA_PIN_SECONDS, и до её истечения реплики не используются.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pinned = REPLICA_PIN_COOKIE in request.COOKIES
+        with track_writes(pinned) as written:
+            response = self.get_response(request)
+            if DATABASE_REPLICAS and written():
+                response.set_cookie(
+                    REPLICA_PIN_COOKIE, '1',
+                    max_age=REPLICA_PIN_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        return response
+
+
+class MetricsMiddleware:
+    """Снимает метрики запроса с разметкой по имени URL.
+
+    SQL берётся у записи QueryBudgetMiddleware, поэтому эта прослойка
+    должна стоять перед ней.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with metrics.track_request() as stats:
+            response = self.get_response(request)
+        match = request.resolver_match
+        metrics.record_request(
+            view=match.view_name if match else 'unresolved',
+            status=response.status_code,
+            duration=time.perf_counter() - start,
+            stats=stats,
+            recorder=getattr(request, 'query_recorder', None),
+        )
+        return response
+
+
+class SlowLogMiddleware:
+    """Пишет в журнал медленные запросы и случайную выборку остальных.
+
+    Стоит после QueryBudgetMiddleware: у запросов из выборки стек
+    снимается для каждого SQL-запроса, у остальных — только для
+    запросов медленнее SLOWLOG_QUERY_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = getattr(request, 'query_recorder', None)
+        is_sampled = slowlog.sampled()
+        if recorder is not None:
+            recorder.stack_threshold = (
+                0 if is_sampled else settings.SLOWLOG_QUERY_SECONDS
+            )
+        start = time.perf_counter()
+        response = self.get_response(request)
+        slowlog.record(
+            request, response, time.perf_counter() - start,
+            recorder, is_sampled
+        )
+        return response
+
+
+class TracingMiddleware:
+    """Трасса запроса: спаны middleware, представления, SQL, шаблонов
+    и кеша.
+
+    Стоит в MIDDLEWARE сразу после StaticFilesMiddleware и оборачивает
+    спанами всю цепочку после себя. Без TRACE_FILE отключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.TRACE_FILE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        tracing.trace_middleware_chain(self)
+
+    def __call__(self, request):
+        with tracing.trace_request():
+            with tracing.span('request', tracing.KIND_SERVER, **{
+                'http.method': request.method,
+                'http.target': request.get_full_path(),
+            }) as root:
+                response = self.get_response(request)
+                match = request.resolver_match
+                route = match.view_name if match else 'unresolved'
+                root.name = f'{request.method} {route}'
+                root.attributes['http.route'] = route
+                root.attributes['http.status_code'] = response.status_code
+        return response
+
+
+class StaticFilesMiddleware:
+    """Отдаёт собранную статику из STATIC_ROOT.
+
+    Стоит первым в MIDDLEWARE, чтобы запросы к статике не попадали
+    в метрики, трассы и журнал медленных запросов. Файлы не сжимаются
+    на лету: берутся копии, подготовленные collectstatic.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        prefix = settings.STATIC_URL
+        path = request.path_info
+        if request.method in ('GET', 'HEAD') and path.startswith(prefix):
+            response = staticfiles.serve(request, path[len(prefix):])
+            if response is not None:
+                return response
+        return self.get_response(request)
@@ -0,0 +1,157 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+from . import slowlog
+
+
+logger = logging.getLogger('core.queries')
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LISTS = re.compile(r'\((?:\s*(?:%s|\?)\s*,)+\s*(?:%s|\?)\s*\)')
+# Полный перебор таблицы и сортировка во временном дереве в плане SQLite
+PLAN_PROBLEMS = re.compile(r'^SCAN (?:TABLE )?\w+$|USE TEMP B-TREE')
+
+
+class QueryBudgetExceeded(Exception):
+    """Представление сделало больше запросов, чем заявлено."""
+
+
+def query_shape(sql):
+    """Форма запроса: SQL без литералов и с однотипными списками IN."""
+    shape = LITERALS.sub('?', sql).replace('%s', '?')
+    return PLACEHOLDER_LISTS.sub('(...)', shape)
+
+
+class QueryRecorder:
+    """Записывает все SQL-запросы, выполненные внутри блока with.
+
+    Запросам не быстрее stack_threshold секунд добавляется стек
+    и шаблон, откуда они выполнены; None — стек не нужен.
+    """
+
+    def __init__(self, using=None, stack_threshold=None):
+        self.using = using
+        self.stack_threshold = stack_threshold
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        aliases = [self.using] if self.using else connections
+        for alias in aliases:
+            self._stack.enter_context(
+                connections[alias].execute_wrapper(self)
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            query = {
+                'sql': sql,
+                'params': params,
+                'alias': context['connection'].alias,
+                'time': time.perf_counter() - start,
+            }
+            threshold = self.stack_threshold
+            if threshold is not None and query['time'] >= threshold:
+                query.update(slowlog.query_origin())
+            self.queries.append(query)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=None):
+        """Формы запросов, повторённые не меньше threshold раз (N+1)."""
+        if threshold is None:
+            threshold = settings.QUERY_REPEAT_THRESHOLD
+        shapes = Counter(query_shape(query['sql']) for query in self.queries)
+        return {
+            shape: count for shape, count in shapes.items()
+            if count >= threshold
+        }
+
+    def report(self):
+        lines = [f'{len(self)} запросов']
+        for shape, count in self.repeated().items():
+            lines.append(f'  {count} x {shape}')
+        return '\n'.join(lines)
+
+
+def explain(sql, params=None, using='default'):
+    """План выполнения запроса: по строке на шаг."""
+    connection = connections[using]
+    prefix = 'EXPLAIN '
+    if connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(plan):
+    """Шаги плана, которые обходятся без подходящего индекса."""
+    return [step for step in plan if PLAN_PROBLEMS.search(step)]
+
+
+def query_budget(limit):
+    """Объявляет бюджет SQL-запросов представления.
+
+    Проверяет QueryBudgetMiddleware: в тестах превышение — ошибка,
+    в работе — предупреждение в журнале.
+    """
+    def decorator(view_func):
+        view_func.query_budget = limit
+        return view_func
+    return decorator
+
+
+def check_budget(name, recorder, limit):
+    if limit is None or len(recorder) <= limit:
+        repeated = recorder.repeated()
+        if repeated:
+            logger.warning('%s: повторяющиеся запросы\n%s',
+                           name, recorder.report())
+        return
+    message = f'{name}: бюджет {limit}, выполнено {recorder.report()}'
+    if settings.QUERY_BUDGET_STRICT:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+class QueryBudgetTestMixin:
+    """Проверки числа и повторяемости запросов для TestCase."""
+
+    def assertWithinQueryBudget(self, limit, func, *args, **kwargs):
+        with QueryRecorder() as recorder:
+            result = func(*args, **kwargs)
+        self.assertLessEqual(len(recorder), limit, recorder.report())
+        return result
+
+    def assertNoRepeatedQueries(self, func, *args, threshold=None, **kwargs):
+        with QueryRecorder() as recorder:
+            result = func(*args, **kwargs)
+        self.assertFalse(recorder.repeated(threshold), recorder.report())
+        return result
+
+    def assertUsesIndex(self, queryset, index):
+        """Запрос идёт по индексу index без перебора и пересортировки."""
+        sql, params = queryset.query.sql_with_params()
+        plan = explain(sql, params, queryset.db)
+        report = '\n'.join([sql, *plan])
+        self.assertTrue(
+            any(index in step for step in plan),
+            f'индекс {index} не используется:\n{report}'
+        )
+        self.assertFalse(plan_problems(plan), report)
@@ -0,0 +1,111 @@
+import os
+import random
+import sys
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from . import metrics
+from .logs import JSONLog
+
+
+# Кадры самого журнала и счётчика запросов в стек не попадают
+SKIP_FILES = ('slowlog.py', 'queries.py')
+STACK_DEPTH = 20
+
+log = JSONLog('core.slowlog', lambda: (
+    settings.SLOWLOG_FILE,
+    settings.SLOWLOG_MAX_BYTES,
+    settings.SLOWLOG_BACKUP_COUNT,
+), key=lambda entry: entry['time'])
+
+
+def _project_frame(filename):
+    base = str(settings.BASE_DIR)
+    return (
+        filename.startswith(base)
+        and 'site-packages' not in filename
+        and not filename.endswith(SKIP_FILES)
+    )
+
+
+def query_origin():
+    """Откуда выполнен запрос: кадры кода проекта и шаблон.
+
+    Шаблон — узел, который отрисовывался в момент запроса: ленивый
+    QuerySet часто выполняется в шаблоне, а не в представлении.
+    """
+    frame = sys._getframe(1)
+    stack = []
+    template = None
+    while frame is not None:
+        code = frame.f_code
+        if template is None and code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            if origin is not None:
+                template = f'{origin.template_name}:{node.token.lineno}'
+        if _project_frame(code.co_filename):
+            filename = os.path.relpath(code.co_filename, settings.BASE_DIR)
+            stack.append(f'{filename}:{frame.f_lineno} in {code.co_name}')
+        frame = frame.f_back
+    return {'stack': stack[:STACK_DEPTH][::-1], 'template': template}
+
+
+def sampled():
+    """Попадает ли запрос в выборку SLOWLOG_SAMPLE_RATE."""
+    rate = settings.SLOWLOG_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+def reason(duration, recorder, is_sampled):
+    """Почему запрос записывается в журнал, или None."""
+    if is_sampled:
+        return 'sampled'
+    if duration >= settings.SLOWLOG_REQUEST_SECONDS:
+        return 'slow_request'
+    if recorder is not None and any(
+        query['time'] >= settings.SLOWLOG_QUERY_SECONDS
+        for query in recorder.queries
+    ):
+        return 'slow_query'
+    return None
+
+
+def record(request, response, duration, recorder, is_sampled):
+    """Пишет запрос в журнал, если он медленный или попал в выборку."""
+    why = reason(duration, recorder, is_sampled)
+    if why is None:
+        return None
+    match = request.resolver_match
+    queries = recorder.queries if recorder is not None else []
+    stats = metrics.current_stats()
+    entry = {
+        'time': datetime.now(timezone.utc).isoformat(),
+        'pid': os.getpid(),
+        'reason': why,
+        'method': request.method,
+        'path': request.path,
+        'view': match.view_name if match else 'unresolved',
+        'status': response.status_code,
+        'duration': round(duration, 6),
+        'sql_time': round(sum(query['time'] for query in queries), 6),
+        'template_time': round(stats.template_seconds, 6) if stats else None,
+        'queries': [
+            {
+                'sql': query['sql'],
+                'alias': query['alias'],
+                'time': round(query['time'], 6),
+                'stack': query.get('stack'),
+                'template': query.get('template'),
+            }
+            for query in queries
+        ],
+    }
+    log.write(entry)
+    return entry
+
+
+def read_entries(path=None):
+    """Записи журнала всех процессов вместе с ротированными файлами."""
+    return log.read(path)
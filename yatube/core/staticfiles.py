@@ -0,0 +1,146 @@
+import gzip
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date
+from django.views.static import was_modified_since
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESSIBLE = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.json', '.xml', '.map', '.html'
+)
+# Имя, в которое ManifestStaticFilesStorage вписывает 12 символов md5
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^./]+$')
+# Порядок предпочтения: brotli меньше gzip
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _gzip(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    """Доступные сжатия: (суффикс файла, функция)."""
+    if brotli is not None:
+        yield '.br', _brotli
+    yield '.gz', _gzip
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в имени и заранее сжатыми копиями.
+
+    collectstatic рядом с каждым текстовым файлом кладёт .gz и, если
+    установлен brotli, .br. Пока статика не собрана, {% static %}
+    отдаёт адрес без хеша вместо ошибки.
+    """
+
+    manifest_strict = False
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            return name
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            for compressed in self.compress(name):
+                yield name, compressed, True
+
+    def compress(self, name):
+        """Сжатые копии файла, если они меньше оригинала."""
+        if not name.endswith(COMPRESSIBLE) or not self.exists(name):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as file:
+            data = file.read()
+        for suffix, encode in encoders():
+            compressed = encode(data)
+            if len(compressed) >= len(data):
+                continue
+            temp = f'{path}{suffix}.tmp'
+            with open(temp, 'wb') as file:
+                file.write(compressed)
+            os.replace(temp, path + suffix)
+            yield name + suffix
+
+
+def accepted_encodings(header):
+    """Сжатия из Accept-Encoding, кроме запрещённых через q=0."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def serve(request, name):
+    """Ответ с файлом из STATIC_ROOT или None, если файла нет.
+
+    Сжатая копия выбирается по Accept-Encoding; файлы с хешем в имени
+    кешируются навсегда, остальные — с проверкой по Last-Modified.
+    """
+    if not settings.STATIC_ROOT:
+        return None
+    try:
+        path = safe_join(settings.STATIC_ROOT, name)
+    except SuspiciousFileOperation:
+        return None
+    if not os.path.isfile(path):
+        return None
+    accepted = accepted_encodings(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    encoding, served = None, path
+    for coding, suffix in ENCODINGS:
+        if coding in accepted and os.path.isfile(path + suffix):
+            encoding, served = coding, path + suffix
+            break
+    stat = os.stat(served)
+    if was_modified_since(
+        request.META.get('HTTP_IF_MODIFIED_SINCE'),
+        stat.st_mtime, stat.st_size
+    ):
+        response = FileResponse(open(served, 'rb'))
+        content_type, _ = mimetypes.guess_type(path)
+        response['Content-Type'] = content_type or 'application/octet-stream'
+        response['Last-Modified'] = http_date(stat.st_mtime)
+        if encoding:
+            response['Content-Encoding'] = encoding
+    else:
+        response = HttpResponseNotModified()
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME.search(name):
+        response['Cache-Control'] = (
+            f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+        )
+    else:
+        response['Cache-Control'] = 'public, no-cache'
+    return response
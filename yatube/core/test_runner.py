@@ -0,0 +1,41 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.core.cache import caches
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """В тестах превышение бюджета запросов — ошибка, а не предупреждение.
+
+    Кеши в файлах, метрики, журнал медленных запросов и трассы
+    переносятся во временный каталог, чтобы тесты не видели рабочие данные.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_STRICT = True
+        self.temp_dir = tempfile.mkdtemp()
+        settings.METRICS_DIR = os.path.join(self.temp_dir, 'metrics')
+        settings.SLOWLOG_FILE = os.path.join(self.temp_dir, 'slow.jsonl')
+        settings.SLOWLOG_SAMPLE_RATE = 0
+        settings.TRACE_FILE = os.path.join(self.temp_dir, 'traces.jsonl')
+        settings.TRACE_SAMPLE_RATE = 0
+        settings.CACHES = {
+            alias: self.test_cache(alias, config)
+            for alias, config in settings.CACHES.items()
+        }
+        for alias in settings.CACHES:
+            caches[alias].clear()
+
+    def test_cache(self, alias, config):
+        if config['BACKEND'] != 'core.cache.sqlite.SQLiteCache':
+            return config
+        location = os.path.join(self.temp_dir, f'{alias}.sqlite3')
+        return {**config, 'LOCATION': location}
+
+    def teardown_test_environment(self, **kwargs):
+        super().teardown_test_environment(**kwargs)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
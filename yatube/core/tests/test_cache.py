@@ -0,0 +1,99 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.cache.sqlite import SQLiteCache
+
+
+ROUNDS = 30
+
+
+def increment(location):
+    cache = SQLiteCache(location, {})
+    for _ in range(ROUNDS):
+        cache.incr('counter')
+    return ROUNDS
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """Тестирование общего кеша в файле SQLite"""
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.location = os.path.join(self.dir, 'cache.sqlite3')
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.location, {'OPTIONS': options})
+
+    def test_basic_operations(self):
+        """set, get, add, touch, delete и incr ведут себя как у Django"""
+        cache = self.make_cache()
+        cache.set('key', {'value': 1})
+        self.assertEqual(cache.get('key'), {'value': 1})
+        self.assertFalse(cache.add('key', 'other'))
+        self.assertTrue(cache.add('new', 'value'))
+        self.assertTrue(cache.add('counter', 1))
+        self.assertEqual(cache.incr('counter', 5), 6)
+        self.assertRaises(ValueError, cache.incr, 'missing')
+        cache.set('short', 'value', timeout=-1)
+        self.assertIsNone(cache.get('short'))
+        self.assertTrue(cache.add('short', 'again'))
+        self.assertTrue(cache.touch('key', None))
+        self.assertFalse(cache.touch('missing'))
+        cache.delete('key')
+        self.assertFalse(cache.has_key('key'))
+        cache.clear()
+        self.assertEqual(cache._stats(), (0, 0))
+
+    def test_values_are_shared_between_instances(self):
+        """Два экземпляра над одним файлом видят общие данные"""
+        self.make_cache().set('key', 'value')
+        self.assertEqual(self.make_cache().get('key'), 'value')
+
+    def test_least_recently_read_entries_are_evicted(self):
+        """Сверх MAX_ENTRIES вытесняются давно не читанные записи"""
+        cache = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        with mock.patch('core.cache.sqlite.time.time') as clock:
+            for number in range(10):
+                clock.return_value = 1000 + number
+                cache.set(f'key{number}', number, timeout=None)
+            clock.return_value = 2000
+            cache.get('key0')
+            cache.set('key10', 10, timeout=None)
+        self.assertTrue(cache.has_key('key0'))
+        self.assertFalse(cache.has_key('key1'))
+        self.assertTrue(cache.has_key('key10'))
+        self.assertLessEqual(cache._stats()[0], 10)
+
+    def test_size_limit(self):
+        """Сверх MAX_SIZE удаляются старые записи"""
+        cache = self.make_cache(MAX_SIZE=3000)
+        for number in range(5):
+            cache.set(f'key{number}', 'x' * 1000)
+        self.assertLessEqual(cache._stats()[1], 3000)
+        self.assertTrue(cache.has_key('key4'))
+        self.assertFalse(cache.has_key('key0'))
+
+    def test_incr_is_atomic_between_processes(self):
+        """incr из нескольких процессов не теряет приращений"""
+        cache = self.make_cache()
+        cache.set('counter', 0)
+        cache.disconnect()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(4) as pool:
+            total = sum(pool.map(increment, [self.location] * 4))
+        self.assertEqual(self.make_cache().get('counter'), total)
+
+    def test_benchmark_command(self):
+        """Сравнение бэкендов печатает строку на каждый бэкенд"""
+        out = StringIO()
+        call_command('benchmark_cache', keys=20, stdout=out)
+        for name in ('locmem', 'filebased', 'sqlite'):
+            self.assertIn(name, out.getvalue())
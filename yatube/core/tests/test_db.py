@@ -0,0 +1,133 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.test import SimpleTestCase
+
+from posts.models import Comment, Post, User, UserCounters
+
+
+ALIAS = 'concurrency'
+WRITERS = 3
+READERS = 3
+ROUNDS = 30
+
+
+def use_database(alias):
+    """Делает базу alias базой default в дочернем процессе.
+
+    Сигналы постов пишут счётчики, ленты и поиск в default, поэтому
+    без этого под нагрузкой оказалась бы только часть записи.
+    """
+    connections.databases[DEFAULT_DB_ALIAS] = connections.databases[alias]
+    if hasattr(connections._connections, DEFAULT_DB_ALIAS):
+        del connections[DEFAULT_DB_ALIAS]
+
+
+def write_posts(number):
+    """Пишет посты с комментариями: сначала читает, потом пишет.
+
+    Записи идут через save() со всеми сигналами, как в представлениях.
+    """
+    use_database(ALIAS)
+    for _ in range(ROUNDS):
+        with transaction.atomic():
+            author = User.objects.get(username=f'writer{number}')
+            last = Post.objects.filter(author=author).first()
+            post = Post.objects.create(
+                author=author, text=f'После {last and last.pk}'
+            )
+            for _ in range(3):
+                Comment.objects.create(
+                    post=post, author=author, text='Комментарий'
+                )
+    connections.close_all()
+    return ROUNDS
+
+
+def read_feeds(number):
+    """Читает ленты авторов и комментарии последних постов."""
+    pages = 0
+    for _ in range(ROUNDS):
+        for author in User.objects.using(ALIAS).all():
+            posts = list(
+                Post.objects.using(ALIAS).filter(author=author)
+                .order_by('-pub_date', '-id')[:10]
+            )
+            list(Comment.objects.using(ALIAS).filter(post__in=posts))
+            pages += 1
+    connections[ALIAS].close()
+    return pages
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    """Тестирование SQLite с WAL под несколькими процессами"""
+    # Функции данных в миграциях читают пустую базу default
+    databases = {ALIAS, 'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        connections.databases[ALIAS] = {
+            'ENGINE': 'core.db.sqlite3',
+            'NAME': os.path.join(cls.dir, 'db.sqlite3'),
+        }
+        connections.ensure_defaults(ALIAS)
+        connections.prepare_test_settings(ALIAS)
+        super().setUpClass()
+        call_command('migrate', database=ALIAS, verbosity=0)
+        User.objects.using(ALIAS).bulk_create(
+            User(username=f'writer{number}') for number in range(WRITERS)
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[ALIAS].close()
+        del connections[ALIAS]
+        del connections.databases[ALIAS]
+        shutil.rmtree(cls.dir, ignore_errors=True)
+
+    def test_pragmas(self):
+        """Новое соединение получает WAL и остальные прагмы"""
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+
+    def test_concurrent_writers_and_readers(self):
+        """Параллельные писатели и читатели обходятся без блокировок"""
+        connections[ALIAS].close()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(WRITERS + READERS) as pool:
+            writes = pool.map_async(write_posts, range(WRITERS))
+            reads = pool.map_async(read_feeds, range(READERS))
+            self.assertEqual(sum(writes.get(60)), WRITERS * ROUNDS)
+            self.assertGreater(sum(reads.get(60)), 0)
+        self.assertEqual(
+            Post.objects.using(ALIAS).count(), WRITERS * ROUNDS
+        )
+        self.assertEqual(
+            Comment.objects.using(ALIAS).count(), WRITERS * ROUNDS * 3
+        )
+        self.assertEqual(
+            list(UserCounters.objects.using(ALIAS).values_list(
+                'posts_count', flat=True
+            )),
+            [ROUNDS] * WRITERS
+        )
+        self.assertEqual(
+            set(Post.objects.using(ALIAS).values_list(
+                'comments_count', flat=True
+            )),
+            {3}
+        )
+        with connections[ALIAS].cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM posts_post_fts')
+            self.assertEqual(cursor.fetchone()[0], WRITERS * ROUNDS)
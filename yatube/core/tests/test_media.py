@@ -0,0 +1,105 @@
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+
+class MediaTests(SimpleTestCase):
+    """Тестирование отдачи загруженных файлов"""
+    content = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        os.makedirs(os.path.join(self.dir, 'posts'))
+        with open(os.path.join(self.dir, 'posts', 'a.jpg'), 'wb') as file:
+            file.write(self.content)
+        override = override_settings(MEDIA_ROOT=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.url = reverse('media', args=['posts/a.jpg'])
+
+    def get(self, **headers):
+        return self.client.get(self.url, **headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_file_with_validators(self):
+        """Файл отдаётся с ETag, Last-Modified и типом"""
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.body(response), self.content)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        for header in ('ETag', 'Last-Modified', 'Cache-Control'):
+            self.assertTrue(response.has_header(header))
+
+    def test_not_modified(self):
+        """If-None-Match и If-Modified-Since дают 304"""
+        response = self.get()
+        for headers in (
+            {'HTTP_IF_NONE_MATCH': response['ETag']},
+            {'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']},
+        ):
+            with self.subTest(headers=headers):
+                self.assertEqual(self.get(**headers).status_code, 304)
+
+    def test_ranges(self):
+        """Один диапазон отдаётся частью файла"""
+        size = len(self.content)
+        for header, start, end in (
+            ('bytes=0-9', 0, 9),
+            ('bytes=1000-', 1000, size - 1),
+            ('bytes=-24', size - 24, size - 1),
+            ('bytes=1000-5000', 1000, size - 1),
+        ):
+            with self.subTest(header=header):
+                response = self.get(HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(
+                    response['Content-Range'], f'bytes {start}-{end}/{size}'
+                )
+                self.assertEqual(
+                    int(response['Content-Length']), end - start + 1
+                )
+                self.assertEqual(
+                    self.body(response), self.content[start:end + 1]
+                )
+
+    def test_bad_ranges(self):
+        """Непонятный диапазон игнорируется, за концом файла — 416"""
+        response = self.get(HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, 200)
+        response = self.get(HTTP_RANGE='bytes=5000-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], 'bytes */1024')
+
+    def test_stale_if_range(self):
+        """Диапазон по устаревшему If-Range не отдаётся"""
+        response = self.get(HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"old"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_sendfile_modes(self):
+        """Файл передаётся веб-серверу заголовком"""
+        with self.settings(MEDIA_SENDFILE='x-accel-redirect'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/a.jpg'
+        )
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SENDFILE='x-sendfile'):
+            response = self.get()
+        self.assertEqual(
+            response['X-Sendfile'],
+            os.path.join(self.dir, 'posts', 'a.jpg')
+        )
+
+    def test_missing_and_outside_files(self):
+        """Чужие и несуществующие пути — 404"""
+        for path in ('posts/none.jpg', '../secret', 'posts'):
+            with self.subTest(path=path):
+                response = self.client.get(f'/media/{path}')
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.metrics import registry
+
+
+class MetricsTests(TestCase):
+    """Тестирование метрик Prometheus"""
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        override = override_settings(METRICS_DIR=self.dir)
+        override.enable()
+        self.addCleanup(override.disable)
+        registry.reset()
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_views_are_measured(self):
+        """Запросы попадают в гистограммы с именем URL"""
+        self.client.get(reverse('posts:index'))
+        self.client.get(reverse('posts:index'))
+        text = self.scrape()
+        for line in (
+            'yatube_request_duration_seconds_count{view="posts:index"} 2',
+            'yatube_request_queries_bucket{view="posts:index",le="+Inf"} 2',
+            'yatube_requests_total{view="posts:index",status="200"} 2',
+            '# TYPE yatube_template_render_seconds histogram',
+        ):
+            self.assertIn(line, text)
+        self.assertIn(
+            'yatube_cache_requests_total{view="posts:index",result="hit"}',
+            text
+        )
+        self.assertIn('yatube_lookup_total{lookup="group"', text)
+
+    def test_processes_are_summed(self):
+        """Файлы других процессов складываются с текущим"""
+        self.client.get(reverse('posts:index'))
+        with open(os.path.join(self.dir, 'other.json'), 'w') as file:
+            json.dump({
+                'histograms': [],
+                'counters': [[
+                    'yatube_requests_total',
+                    [['view', 'posts:index'], ['status', 200]],
+                    5
+                ]],
+            }, file)
+        self.assertIn(
+            'yatube_requests_total{view="posts:index",status="200"} 6',
+            self.scrape()
+        )
+
+    def test_dead_processes_are_archived(self):
+        """Файлы завершившихся процессов вливаются в архив"""
+        self.client.get(reverse('posts:index'))
+        counter = [
+            'yatube_requests_total',
+            [['view', 'posts:index'], ['status', 200]],
+            5
+        ]
+        for pid in (2 ** 30, 2 ** 30 + 1):
+            with open(os.path.join(self.dir, f'{pid}.json'), 'w') as file:
+                json.dump({'histograms': [], 'counters': [counter]}, file)
+        line = 'yatube_requests_total{view="posts:index",status="200"} 11'
+        self.assertIn(line, self.scrape())
+        self.assertEqual(
+            {name for name in os.listdir(self.dir) if name.endswith('.json')},
+            {'archive.json', f'{os.getpid()}.json'}
+        )
+        self.assertIn(line, self.scrape())
+
+    def test_access_is_limited(self):
+        """Чужие адреса не видят метрики"""
+        response = self.client.get(
+            reverse('metrics'), REMOTE_ADDR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, 403)
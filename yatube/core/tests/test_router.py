@@ -0,0 +1,104 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections, transaction
+from django.test import Client, TransactionTestCase
+from django.urls import reverse
+
+from core.db.router import track_writes, use_primary
+from posts.models import Group, Post, User
+from yatube.settings import REPLICA_PIN_COOKIE
+
+
+REPLICA = 'replica'
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    """Тестирование чтения с реплики, скопированной из основной базы"""
+    databases = {'default', REPLICA}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.dir = tempfile.mkdtemp()
+        connections.databases[REPLICA] = {
+            'ENGINE': 'core.db.sqlite3',
+            'NAME': os.path.join(cls.dir, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults(REPLICA)
+        connections.prepare_test_settings(REPLICA)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(cls.dir, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        for target in (
+            'core.db.router.DATABASE_REPLICAS',
+            'core.middleware.DATABASE_REPLICAS',
+            'core.management.commands.sync_replica.DATABASE_REPLICAS',
+            'posts.cache.DATABASE_REPLICAS',
+        ):
+            patcher = mock.patch(target, [REPLICA])
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.author = User.objects.create_user(username='writer')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        call_command('sync_replica', stdout=StringIO())
+
+    def test_reads_go_to_replica(self):
+        """Чтение идёт с реплики, в транзакции и после записи — с основной"""
+        Post.objects.create(author=self.author, text='Новый пост')
+        with track_writes() as written:
+            self.assertEqual(Post.objects.count(), 1)
+            with use_primary():
+                self.assertEqual(Post.objects.count(), 2)
+            with transaction.atomic():
+                self.assertEqual(Post.objects.count(), 2)
+            self.assertFalse(written())
+            User.objects.create_user(username='other')
+            self.assertFalse(written())
+            self.assertEqual(Post.objects.count(), 1)
+            Group.objects.create(title='Группа', slug='group')
+            self.assertTrue(written())
+            self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_writer_reads_own_comment(self):
+        """После записи автор читает с основной базы, остальные — с реплики"""
+        writer = Client()
+        writer.force_login(self.author)
+        reader = Client()
+        reader.force_login(User.objects.create_user(username='reader'))
+        response = writer.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            data={'text': 'Комментарий'}
+        )
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        url = reverse('posts:post_comments', args=[self.post.pk])
+        self.assertEqual(len(writer.get(url).context['comments']), 1)
+        self.assertEqual(len(reader.get(url).context['comments']), 0)
+        call_command('sync_replica', stdout=StringIO())
+        self.assertEqual(len(reader.get(url).context['comments']), 1)
+
+    def test_versioned_pages_follow_replica(self):
+        """Версия кэша страницы читается с той же реплики, что и данные"""
+        url = reverse('posts:index')
+        client = Client()
+        self.assertEqual(len(client.get(url).context['page_obj']), 1)
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = client.get(url)
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertNotContains(response, 'Новый пост')
+        call_command('sync_replica', stdout=StringIO())
+        self.assertContains(client.get(url), 'Новый пост')
@@ -0,0 +1,98 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.slowlog import read_entries
+from posts.models import Post, User
+
+
+class SlowLogTests(TestCase):
+    """Тестирование журнала медленных запросов"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='slow')
+        Post.objects.create(author=cls.user, text='Медленный пост')
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.path = os.path.join(self.dir, 'slow.jsonl')
+        override = override_settings(SLOWLOG_FILE=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.url = reverse('posts:profile', args=[self.user.username])
+
+    def entries(self):
+        return list(read_entries(self.path))
+
+    def test_sampled_request_has_stacks(self):
+        """У запроса из выборки есть стек и шаблон каждого SQL-запроса"""
+        with self.settings(SLOWLOG_SAMPLE_RATE=1):
+            self.client.get(self.url)
+        [entry] = self.entries()
+        self.assertEqual(entry['reason'], 'sampled')
+        self.assertEqual(entry['view'], 'posts:profile')
+        self.assertTrue(entry['queries'])
+        for query in entry['queries']:
+            self.assertTrue(query['stack'])
+        frames = [frame for query in entry['queries']
+                  for frame in query['stack']]
+        self.assertTrue(any('posts/views.py' in frame for frame in frames))
+        self.assertTrue(any(
+            query['template'] for query in entry['queries']
+        ))
+
+    def test_slow_request_is_recorded(self):
+        """Медленный запрос пишется, стек только у медленных SQL"""
+        with self.settings(SLOWLOG_REQUEST_SECONDS=0):
+            self.client.get(self.url)
+        [entry] = self.entries()
+        self.assertEqual(entry['reason'], 'slow_request')
+        self.assertTrue(entry['queries'])
+        self.assertIsNone(entry['queries'][0]['stack'])
+
+    def test_fast_requests_are_skipped(self):
+        """Быстрые запросы вне выборки не пишутся"""
+        with self.settings(
+            SLOWLOG_REQUEST_SECONDS=60, SLOWLOG_QUERY_SECONDS=60
+        ):
+            self.client.get(self.url)
+        self.assertEqual(self.entries(), [])
+
+    def test_processes_write_own_files(self):
+        """Каждый процесс пишет свой файл, читаются файлы всех процессов"""
+        dead = []
+        for number, time in enumerate(('2000-01-01', '2000-01-02')):
+            # Процессов с такими pid нет
+            pid = 10 ** 9 + number
+            dead.append(os.path.join(self.dir, f'slow.{pid}.jsonl'))
+            with open(dead[-1], 'w') as file:
+                json.dump({'time': time, 'view': 'old'}, file)
+            os.utime(dead[-1], (number, number))
+        with self.settings(SLOWLOG_SAMPLE_RATE=1, SLOWLOG_BACKUP_COUNT=1):
+            self.client.get(self.url)
+        self.assertTrue(os.path.exists(
+            os.path.join(self.dir, f'slow.{os.getpid()}.jsonl')
+        ))
+        self.assertFalse(os.path.exists(dead[0]))
+        self.assertEqual(
+            [entry['view'] for entry in self.entries()],
+            ['old', 'posts:profile']
+        )
+
+    def test_report(self):
+        """Сводка называет представление и его запросы"""
+        with self.settings(SLOWLOG_SAMPLE_RATE=1):
+            self.client.get(self.url)
+        out = StringIO()
+        call_command('slow_report', file=self.path, stdout=out)
+        self.assertIn('posts:profile', out.getvalue())
+        self.assertIn('posts/profile.html', out.getvalue())
@@ -0,0 +1,90 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from core.staticfiles import brotli
+
+
+class StaticFilesTests(SimpleTestCase):
+    """Тестирование собранной статики"""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.dir = tempfile.mkdtemp()
+        cls.override = override_settings(STATIC_ROOT=cls.dir)
+        cls.override.enable()
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.url = staticfiles_storage.url('css/bootstrap.min.css')
+        with open(os.path.join(
+            settings.STATICFILES_DIRS[0], 'css', 'bootstrap.min.css'
+        ), 'rb') as file:
+            cls.content = file.read()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.override.disable()
+        shutil.rmtree(cls.dir, ignore_errors=True)
+        super().tearDownClass()
+
+    def get(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_hashed_names_and_compressed_copies(self):
+        """Имена с хешем, рядом сжатые копии"""
+        self.assertRegex(self.url, r'bootstrap\.min\.[0-9a-f]{12}\.css$')
+        path = staticfiles_storage.path(
+            self.url[len(settings.STATIC_URL):]
+        )
+        self.assertTrue(os.path.exists(path + '.gz'))
+        if brotli is not None:
+            self.assertTrue(os.path.exists(path + '.br'))
+
+    def test_precompressed_file_is_served(self):
+        """Сжатая копия выбирается по Accept-Encoding"""
+        response, body = self.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip, deflate'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(gzip.decompress(body), self.content)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_identity(self):
+        """Без Accept-Encoding или с q=0 файл отдаётся как есть"""
+        for header in ('', 'gzip;q=0'):
+            with self.subTest(header=header):
+                response, body = self.get(
+                    self.url, HTTP_ACCEPT_ENCODING=header
+                )
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertEqual(body, self.content)
+
+    def test_not_modified(self):
+        """Повторный запрос с If-Modified-Since получает 304"""
+        response, _ = self.get(self.url)
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_unhashed_name_is_revalidated(self):
+        """Файл без хеша в имени не кешируется навсегда"""
+        response, _ = self.get('/static/css/bootstrap.min.css')
+        self.assertEqual(response['Cache-Control'], 'public, no-cache')
+
+    def test_missing_manifest_falls_back(self):
+        """Без собранной статики адрес остаётся без хеша"""
+        with override_settings(STATIC_ROOT=os.path.join(self.dir, 'none')):
+            self.assertEqual(
+                staticfiles_storage.url('css/bootstrap.min.css'),
+                '/static/css/bootstrap.min.css'
+            )
@@ -0,0 +1,90 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import engines
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from core.tracing import read_traces, trace_request
+from posts.models import Comment, Post, User
+
+
+class TracingTests(TestCase):
+    """Тестирование трассировки запросов"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='traced')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        Comment.objects.create(post=cls.post, author=cls.user, text='Да')
+
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir, ignore_errors=True)
+        self.path = os.path.join(self.dir, 'traces.jsonl')
+        override = override_settings(TRACE_FILE=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def test_engine_traces_templates_once(self):
+        """Шаблоны движка, включая вложенные, отдают по одному спану"""
+        backend = engines.all()[0]
+        for _ in range(2):
+            with trace_request() as trace:
+                backend.from_string(
+                    '{% include "includes/footer.html" %}'
+                ).render({})
+                backend.get_template('includes/footer.html').render({})
+            self.assertEqual(
+                [span.name for span in trace.spans],
+                ['template <string>', 'template includes/footer.html',
+                 'template includes/footer.html']
+            )
+
+    def test_sampled_request_is_traced(self):
+        """Спаны запроса складываются в одно дерево"""
+        with self.settings(TRACE_SAMPLE_RATE=1):
+            self.client.get(self.url)
+        [(trace_id, spans)] = read_traces(self.path)
+        names = [span['name'] for span in spans]
+        self.assertEqual(names[0], 'GET posts:post_detail')
+        for name in (
+            'middleware SessionMiddleware', 'view posts:post_detail',
+            'db.query',
+            'cache.get', 'template posts/post_detail.html',
+            'template posts/comments.html', 'template base.html',
+        ):
+            self.assertIn(name, names)
+        ids = {span['spanId'] for span in spans}
+        for span in spans[1:]:
+            self.assertEqual(span['traceId'], trace_id)
+            self.assertIn(span['parentSpanId'], ids)
+
+    def test_fast_requests_are_skipped(self):
+        """Быстрые запросы вне выборки не пишутся"""
+        with self.settings(TRACE_SLOW_SECONDS=60):
+            self.client.get(self.url)
+        self.assertEqual(list(read_traces(self.path)), [])
+
+    def test_slow_requests_are_traced(self):
+        """Запрос дольше порога пишется без выборки"""
+        with self.settings(TRACE_SLOW_SECONDS=0):
+            self.client.get(self.url)
+        self.assertEqual(len(list(read_traces(self.path))), 1)
+
+    def test_show_trace(self):
+        """Команда рисует дерево спанов трассы"""
+        with self.settings(TRACE_SAMPLE_RATE=1):
+            self.client.get(self.url)
+        [(trace_id, _)] = read_traces(self.path)
+        out = StringIO()
+        call_command(
+            'show_trace', trace_id[:8], file=self.path, stdout=out
+        )
+        self.assertIn('GET posts:post_detail', out.getvalue())
+        self.assertIn('    template posts/comments.html', out.getvalue())
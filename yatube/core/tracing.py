@@ -0,0 +1,280 @@
+import functools
+import os
+import random
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+from .logs import JSONLog
+
+
+SERVICE_NAME = 'yatube'
+# Виды спанов OTLP: INTERNAL, SERVER, CLIENT
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+def _trace_start(entry):
+    for resource in entry['resourceSpans']:
+        for scope in resource['scopeSpans']:
+            for span in scope['spans']:
+                return int(span['startTimeUnixNano'])
+    return 0
+
+
+log = JSONLog('core.tracing', lambda: (
+    settings.TRACE_FILE,
+    settings.TRACE_MAX_BYTES,
+    settings.TRACE_BACKUP_COUNT,
+), key=_trace_start)
+
+# Трасса текущего запроса и открытый в ней спан
+_trace = ContextVar('tracing_trace', default=None)
+_span = ContextVar('tracing_span', default=None)
+
+
+class Span:
+    __slots__ = (
+        'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes'
+    )
+
+    def __init__(self, name, parent_id, kind, attributes):
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start = time.time_ns()
+        self.end = None
+        self.attributes = attributes
+
+    def to_otlp(self, trace_id):
+        span = {
+            'traceId': trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def attribute_value(value):
+    """Значение атрибута OTLP обратно в число или строку."""
+    [(kind, raw)] = value.items()
+    if kind == 'intValue':
+        return int(raw)
+    return raw
+
+
+class Trace:
+    """Спаны одного запроса; пишутся в файл, только если трасса нужна."""
+
+    def __init__(self, sampled):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans = []
+
+    def to_otlp(self):
+        """Трасса в формате OTLP/JSON, как его пишет file exporter."""
+        return {'resourceSpans': [{
+            'resource': {'attributes': [{
+                'key': 'service.name',
+                'value': {'stringValue': SERVICE_NAME},
+            }]},
+            'scopeSpans': [{
+                'scope': {'name': __name__},
+                'spans': [span.to_otlp(self.trace_id) for span in self.spans],
+            }],
+        }]}
+
+
+@contextmanager
+def span(name, kind=KIND_INTERNAL, **attributes):
+    """Спан внутри трассы запроса; вне трассы ничего не делает."""
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _span.get()
+    current = Span(
+        name, parent.span_id if parent else None, kind, attributes
+    )
+    trace.spans.append(current)
+    token = _span.set(current)
+    try:
+        yield current
+    finally:
+        current.end = time.time_ns()
+        _span.reset(token)
+
+
+def cache_operation(method):
+    """Спан операции кеша с её ключом."""
+    @functools.wraps(method)
+    def wrapper(cache, key, *args, **kwargs):
+        if _trace.get() is None:
+            return method(cache, key, *args, **kwargs)
+        with span(f'cache.{method.__name__}', KIND_CLIENT, **{
+            'cache.key': key,
+        }):
+            return method(cache, key, *args, **kwargs)
+    return wrapper
+
+
+def trace_template(template):
+    """Делает отрисовку шаблона отдельным спаном и возвращает его же.
+
+    Оборачивается _render экземпляра: его вызывают и {% include %},
+    и родитель {% extends %}. Кешированный шаблон оборачивается один раз.
+    """
+    if '_render' in vars(template):
+        return template
+
+    def _render(context):
+        with span(f'template {template.name or "<string>"}'):
+            return type(template)._render(template, context)
+
+    template._render = _render
+    return template
+
+
+def trace_engine(engine):
+    """Оборачивает поиск и создание шаблонов движка; возвращает его же.
+
+    Шаблоны по-прежнему ищет и создаёт сам Engine. find_template
+    используют и get_template, и {% include %}, и {% extends %}.
+    """
+    find_template = engine.find_template
+    from_string = engine.from_string
+
+    @functools.wraps(find_template)
+    def traced_find_template(*args, **kwargs):
+        template, origin = find_template(*args, **kwargs)
+        return trace_template(template), origin
+
+    @functools.wraps(from_string)
+    def traced_from_string(template_code):
+        return trace_template(from_string(template_code))
+
+    engine.find_template = traced_find_template
+    engine.from_string = traced_from_string
+    return engine
+
+
+def query_span(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: каждый запрос — спан с его текстом."""
+    connection = context['connection']
+    with span('db.query', KIND_CLIENT, **{
+        'db.system': connection.vendor,
+        'db.name': connection.alias,
+        'db.statement': sql,
+    }):
+        return execute(sql, params, many, context)
+
+
+def sampled():
+    """Попадает ли запрос в выборку TRACE_SAMPLE_RATE."""
+    rate = settings.TRACE_SAMPLE_RATE
+    return rate > 0 and random.random() < rate
+
+
+@contextmanager
+def trace_request():
+    """Собирает спаны внутри блока в одну трассу.
+
+    Трасса пишется в TRACE_FILE, если запрос попал в выборку
+    или шёл дольше TRACE_SLOW_SECONDS.
+    """
+    trace = Trace(sampled())
+    trace_token = _trace.set(trace)
+    span_token = _span.set(None)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(
+                connections[alias].execute_wrapper(query_span)
+            )
+        try:
+            yield trace
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+    root = trace.spans[0] if trace.spans else None
+    if root is None or root.end is None:
+        return
+    duration = (root.end - root.start) / 1e9
+    if trace.sampled or duration >= settings.TRACE_SLOW_SECONDS:
+        log.write(trace.to_otlp())
+
+
+def read_traces(path=None):
+    """Трассы из журнала: (trace_id, спаны) от старых к новым."""
+    for entry in log.read(path):
+        spans = [
+            span
+            for resource in entry['resourceSpans']
+            for scope in resource['scopeSpans']
+            for span in scope['spans']
+        ]
+        if spans:
+            yield spans[0]['traceId'], spans
+
+
+def _traced_handler(handler, name):
+    def wrapper(request):
+        with span(name):
+            return handler(request)
+    return wrapper
+
+
+def _traced_view(handler):
+    def wrapper(request):
+        with span('view') as current:
+            try:
+                return handler(request)
+            finally:
+                match = request.resolver_match
+                if current is not None and match:
+                    current.name = f'view {match.view_name}'
+    return wrapper
+
+
+def trace_middleware_chain(middleware):
+    """Оборачивает спанами каждое следующее звено цепочки middleware.
+
+    Django связывает middleware через get_response, обёрнутый
+    convert_exception_to_response; обёртка хранит экземпляр
+    следующего middleware в __wrapped__. Последнее звено — разбор
+    URL и вызов представления.
+    """
+    holder = middleware
+    handler = middleware.get_response
+    while True:
+        instance = getattr(handler, '__wrapped__', None)
+        if instance is None or not hasattr(instance, 'get_response'):
+            holder.get_response = _traced_view(handler)
+            return
+        holder.get_response = _traced_handler(
+            handler, f'middleware {type(instance).__name__}'
+        )
+        holder = instance
+        handler = instance.get_response
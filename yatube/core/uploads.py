@@ -0,0 +1,39 @@
+from django.core.files.uploadhandler import (
+    StopUpload, TemporaryFileUploadHandler
+)
+
+from yatube.settings import UPLOAD_MAX_BYTES
+
+
+class BoundedUploadHandler(TemporaryFileUploadHandler):
+    """Пишет загрузку во временный файл по частям.
+
+    Файл больше UPLOAD_MAX_BYTES обрывает разбор запроса: остаток тела
+    не читается, а имя поля попадает в request.rejected_uploads, чтобы
+    форма показала ошибку.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        # Размеру из заголовка части верить нельзя, но он бывает редко
+        # и позволяет отказать сразу
+        if (
+            self.content_length is not None
+            and self.content_length > UPLOAD_MAX_BYTES
+        ):
+            self.reject()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > UPLOAD_MAX_BYTES:
+            self.reject()
+        super().receive_data_chunk(raw_data, start)
+
+    def reject(self):
+        if self.request is not None:
+            self.request.rejected_uploads = [
+                *getattr(self.request, 'rejected_uploads', []),
+                self.field_name,
+            ]
+        raise StopUpload(connection_reset=True)
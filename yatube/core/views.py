@@ -1,5 +1,12 @@
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
 from django.shortcuts import render
 
+from . import media as media_files
+from .metrics import render_metrics
+from .queries import query_budget
+from yatube.settings import METRICS_ALLOWED_IPS
+
 
 def page_not_found(request, exception):
     return render(
@@ -18,3 +25,20 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def metrics(request):
+    """Метрики всех процессов для Prometheus."""
+    if METRICS_ALLOWED_IPS and (
+        request.META.get('REMOTE_ADDR') not in METRICS_ALLOWED_IPS
+    ):
+        raise PermissionDenied
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@query_budget(0)
+def media(request, path):
+    """Загруженные файлы: с диапазонами и проверкой по ETag."""
+    return media_files.serve(request, path)
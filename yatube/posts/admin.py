@@ -1,11 +1,13 @@
 from django.contrib import admin
 from .models import Post, Group
+from .search import get_search_backend
+from yatube.settings import POSTS_SEARCH_ADMIN_LIMIT
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = (
         'pk',
-        'text',
+        'excerpt',
         'pub_date',
         'author',
         'group',
@@ -15,6 +17,15 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по полнотекстовому индексу вместо LIKE '%q%'."""
+        if not search_term:
+            return queryset, False
+        ids = get_search_backend().search(
+            search_term, 0, POSTS_SEARCH_ADMIN_LIMIT
+        )
+        return queryset.filter(pk__in=ids), False
+
 
 admin.site.register(Group)
 admin.site.register(Post, PostAdmin)
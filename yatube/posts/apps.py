@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from core.metrics import registry
+        from .lookups import lookup_metrics
+        registry.register_collector(lookup_metrics)
@@ -0,0 +1,297 @@
+import gzip
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .cache import bump_version
+from .counters import recount_all
+from .models import (
+    Comment, ContentImport, FeedItem, Follow, Group, Post, User,
+    UserCounters
+)
+from .rendering import render_text
+from .search import get_search_backend
+from yatube.settings import FEED_BACKFILL_SIZE, FEED_FANOUT_LIMIT
+
+
+@contextmanager
+def keep_auto_now(*fields):
+    """Отключает auto_now_add у полей на время массовой вставки.
+
+    bulk_create вызывает pre_save, который затирает переданные даты
+    текущим временем; при загрузке и генерации данных даты нужны свои.
+    """
+    saved = [(field, field.auto_now_add) for field in fields]
+    for field, _ in saved:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in saved:
+            field.auto_now_add = value
+
+
+def rebuild_feeds():
+    """Заново раскладывает ленты подписок одним INSERT ... SELECT.
+
+    Как и при подписке, в ленту попадают только FEED_BACKFILL_SIZE
+    последних постов каждого автора; популярные авторы пропускаются
+    так же, как при публикации. Ленты собираются заново, поэтому
+    отметки дочитывания ставятся строго по FEED_FANOUT_LIMIT.
+    """
+    feed = FeedItem._meta.db_table
+    follow = Follow._meta.db_table
+    post = Post._meta.db_table
+    counters = UserCounters._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        FeedItem.objects.all().delete()
+        UserCounters.objects.filter(
+            followers_count__lte=FEED_FANOUT_LIMIT
+        ).update(pulled_since=None)
+        UserCounters.objects.filter(
+            followers_count__gt=FEED_FANOUT_LIMIT, pulled_since__isnull=True
+        ).update(pulled_since=timezone.now())
+        cursor.execute(
+            f'INSERT INTO {feed} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+            f'JOIN (SELECT id, author_id, pub_date, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY pub_date DESC, id DESC'
+            f') AS position FROM {post}) p ON p.author_id = f.author_id '
+            f'LEFT JOIN {counters} c ON c.user_id = f.author_id '
+            f'WHERE p.position <= %s AND c.pulled_since IS NULL',
+            [FEED_BACKFILL_SIZE]
+        )
+
+
+def rebuild_derived():
+    """Пересобирает всё, что сигналы ведут при обычной записи.
+
+    Нужна после bulk_create, который сигналы не отправляет.
+    """
+    recount_all()
+    rebuild_feeds()
+    get_search_backend().rebuild()
+    bump_version('index')
+
+
+# Порядок важен: строки ссылаются только на модели выше по списку.
+CONTENT_MODELS = {
+    # Только то, что нужно для авторства: учётные данные не переносятся
+    'user': (User, ('username', 'first_name', 'last_name')),
+    'group': (Group, ('title', 'slug', 'description')),
+    'post': (Post, ('author_id', 'group_id', 'text', 'pub_date', 'image')),
+    'comment': (Comment, ('post_id', 'author_id', 'text', 'created')),
+    'follow': (Follow, ('user_id', 'author_id')),
+}
+NATURAL_KEYS = {'user': 'username', 'group': 'slug'}
+FOREIGN_KEYS = {
+    'post': {'author_id': 'user', 'group_id': 'group'},
+    'comment': {'post_id': 'post', 'author_id': 'user'},
+    'follow': {'user_id': 'user', 'author_id': 'user'},
+}
+AUTO_NOW_FIELDS = (
+    Post._meta.get_field('pub_date'), Comment._meta.get_field('created')
+)
+
+
+def open_content(path, mode='rt'):
+    """Открывает файл выгрузки; `.gz` читается и пишется сжатым."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def export_records(chunk_size=2000):
+    """Генератор строк выгрузки по всем моделям контента."""
+    for name, (model, fields) in CONTENT_MODELS.items():
+        rows = (
+            model.objects.order_by('pk').values_list('pk', *fields)
+            .iterator(chunk_size=chunk_size)
+        )
+        for pk, *values in rows:
+            yield {'model': name, 'pk': pk, **dict(zip(fields, values))}
+
+
+class ContentEncoder(DjangoJSONEncoder):
+    """Даты пишутся с микросекундами: DjangoJSONEncoder их обрезает."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def write_records(file, records):
+    count = 0
+    for record in records:
+        file.write(json.dumps(
+            record, cls=ContentEncoder, ensure_ascii=False
+        ))
+        file.write('\n')
+        count += 1
+    return count
+
+
+def read_records(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class ContentImporter:
+    """Загружает выгрузку пачками, каждая пачка в своей транзакции.
+
+    Первичные ключи назначает база; соответствие старых id новым
+    пишется в ContentImport вместе с номером строки в той же
+    транзакции, что и пачка, и прерванная загрузка продолжается ровно
+    с первой незафиксированной строки.
+
+    Пользователи переносятся без учётных данных: пароль непригоден
+    для входа, флагов персонала нет.
+    """
+
+    def __init__(self, name, batch_size=5000):
+        self.name = name
+        self.batch_size = batch_size
+        self.maps = {name: {} for name in CONTENT_MODELS}
+        self.line = 0
+        self.done = False
+        self.imported = 0
+        self.skipped = 0
+        self.password = make_password(None)
+        self._load_state()
+
+    def _load_state(self):
+        for state in ContentImport.objects.filter(name=self.name):
+            if state.done:
+                self.done = True
+                continue
+            self.line = state.line
+            for name, pairs in json.loads(state.maps).items():
+                self.maps[name].update(pairs)
+
+    def _save_state(self, **state):
+        ContentImport.objects.create(name=self.name, **state)
+
+    def run(self, records):
+        if self.done:
+            return
+        records = islice(records, self.line, None)
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+            self._import_batch(batch)
+        self._save_state(line=self.line, done=True)
+        self.done = True
+
+    def _import_batch(self, batch):
+        grouped = {name: [] for name in CONTENT_MODELS}
+        for record in batch:
+            grouped[record.pop('model')].append(record)
+        added = {}
+        line = self.line + len(batch)
+        with transaction.atomic(), keep_auto_now(*AUTO_NOW_FIELDS):
+            for name, records in grouped.items():
+                if records:
+                    added[name] = self._import_model(name, records)
+            self._save_state(line=line, maps=json.dumps(added))
+        self.line = line
+
+    def _import_model(self, name, records):
+        model, _ = CONTENT_MODELS[name]
+        mapping = self.maps[name]
+        added = {}
+        natural_key = NATURAL_KEYS.get(name)
+        existing = {}
+        if natural_key:
+            keys = [record[natural_key] for record in records]
+            existing = dict(model.objects.filter(**{
+                f'{natural_key}__in': keys
+            }).values_list(natural_key, 'pk'))
+        objects = []
+        old_pks = []
+        # Новые натуральные ключи: их id известны только после вставки
+        pending = []
+        for record in records:
+            old_pk = str(record.pop('pk'))
+            if not self._resolve(name, record):
+                self.skipped += 1
+                continue
+            if natural_key:
+                value = record[natural_key]
+                if existing.get(value) is not None:
+                    added[old_pk] = existing[value]
+                    continue
+                pending.append((old_pk, value))
+                if value in existing:
+                    # Повтор ключа в пачке получит тот же id
+                    continue
+                existing[value] = None
+            obj = model(**record)
+            if name == 'user':
+                obj.password = self.password
+            if name in ('post', 'comment'):
+                render_text(obj)
+            objects.append(obj)
+            old_pks.append(old_pk)
+        if name == 'follow':
+            # На подписки никто не ссылается, их id не нужны
+            model.objects.bulk_create(
+                objects, batch_size=1000, ignore_conflicts=True
+            )
+        elif natural_key:
+            model.objects.bulk_create(objects, batch_size=1000)
+            created = dict(model.objects.filter(**{
+                f'{natural_key}__in': [value for _, value in pending]
+            }).values_list(natural_key, 'pk'))
+            added.update(
+                (old_pk, created[value]) for old_pk, value in pending
+            )
+        else:
+            added.update(zip(old_pks, self._insert(model, objects)))
+        mapping.update(added)
+        self.imported += len(objects)
+        return added
+
+    @staticmethod
+    def _insert(model, objects):
+        """Вставляет объекты и возвращает назначенные базой id по порядку.
+
+        Где INSERT не возвращает id (SQLite), они дочитываются: пачка
+        идёт в транзакции BEGIN IMMEDIATE, которая держит блокировку
+        записи, и всё новее прежнего max(id) вставлено этой пачкой.
+        """
+        if connection.features.can_return_ids_from_bulk_insert:
+            model.objects.bulk_create(objects, batch_size=1000)
+            return [obj.pk for obj in objects]
+        last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+        model.objects.bulk_create(objects, batch_size=1000)
+        pks = list(
+            model.objects.filter(pk__gt=last).order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        if len(pks) != len(objects):
+            raise DatabaseError(
+                f'В {model._meta.db_table} писали во время загрузки'
+            )
+        return pks
+
+    def _resolve(self, name, record):
+        """Подменяет старые внешние ключи новыми; False — ссылки нет."""
+        for field, target in FOREIGN_KEYS.get(name, {}).items():
+            old = record[field]
+            if old is None:
+                continue
+            new = self.maps[target].get(str(old))
+            if new is None:
+                return False
+            record[field] = new
+        return True
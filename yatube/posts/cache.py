@@ -0,0 +1,54 @@
+import time
+
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import CacheVersion
+from core.db.router import use_primary
+from yatube.settings import DATABASE_REPLICAS
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def get_version(name):
+    """Текущая версия кэшируемых данных name.
+
+    Начальная версия берётся из часов в микросекундах, поэтому после
+    вытеснения ключа из кэша версии не повторяются. С репликами версия
+    читается из CacheVersion той же базой, что и данные страницы:
+    отстающая реплика отдаёт и старые данные, и старую версию.
+    """
+    if DATABASE_REPLICAS:
+        return CacheVersion.objects.filter(name=name).values_list(
+            'version', flat=True
+        ).first() or 0
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(name):
+    """Делает устаревшими все записи кэша, помеченные версией name.
+
+    С репликами версия меняется в основной базе в транзакции записи
+    и доходит до реплик вместе с данными.
+    """
+    if DATABASE_REPLICAS:
+        CacheVersion.objects.bulk_create(
+            [CacheVersion(name=name, version=time.time_ns() // 1000)],
+            ignore_conflicts=True
+        )
+        CacheVersion.objects.filter(name=name).update(
+            version=F('version') + 1
+        )
+        with use_primary():
+            return get_version(name)
+    try:
+        return cache.incr(_version_key(name))
+    except ValueError:
+        return get_version(name)
@@ -0,0 +1,74 @@
+import hashlib
+
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from .cache import get_version
+from .models import Follow, Post, UserCounters
+
+
+def page_etag(request, *parts):
+    """ETag страницы по версиям её данных.
+
+    Версия index меняется при любой правке постов, групп и имён авторов,
+    поэтому она входит в каждый ETag. Страница зависит и от того, кто
+    её смотрит, и от параметров листания.
+    """
+    raw = ':'.join(str(part) for part in (
+        get_version('index'),
+        request.user.pk or 0,
+        request.GET.urlencode(),
+        *parts,
+    ))
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def index_etag(request):
+    return page_etag(request)
+
+
+def group_etag(request, slug):
+    return page_etag(request, slug)
+
+
+def feed_etag(request):
+    return page_etag(request, get_version(f'feed:{request.user.pk}'))
+
+
+def profile_etag(request, username):
+    counters = UserCounters.objects.filter(
+        user__username=username
+    ).values_list(
+        'user', 'posts_count', 'followers_count', 'following_count'
+    ).first()
+    if counters is None:
+        return None
+    following = (
+        request.user.is_authenticated
+        and Follow.objects.filter(
+            user=request.user, author=counters[0]
+        ).exists()
+    )
+    return page_etag(request, *counters, following)
+
+
+def post_etag(request, post_id):
+    versions = Post.objects.filter(pk=post_id).values_list(
+        'version', 'comments_count', 'thumbnails_ready'
+    ).first()
+    if versions is None:
+        return None
+    return page_etag(request, *versions)
+
+
+def conditional_page(etag_func):
+    """Отвечает 304, пока ETag страницы не изменился.
+
+    `no-cache` заставляет браузер каждый раз спрашивать сервер, так что
+    устаревшая страница не показывается, а проверка стоит один запрос.
+    """
+    def decorator(view_func):
+        return cache_control(no_cache=True)(
+            condition(etag_func=etag_func)(view_func)
+        )
+    return decorator
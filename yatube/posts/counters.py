@@ -0,0 +1,88 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404
+
+from .models import Comment, Follow, Post, User, UserCounters
+
+
+def recount_user(user_id):
+    """Пересчитывает счётчики одного пользователя по живым данным."""
+    counters, _ = UserCounters.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': Post.objects.filter(author=user_id).count(),
+            'followers_count': Follow.objects.filter(author=user_id).count(),
+            'following_count': Follow.objects.filter(user=user_id).count(),
+        }
+    )
+    return counters
+
+
+def change_user_counters(user_id, create=True, **deltas):
+    """Сдвигает счётчики пользователя одним UPDATE.
+
+    Если строки счётчиков ещё нет, она создаётся пересчётом, который
+    уже учитывает текущее изменение. При удалениях create=False: строка
+    могла уйти каскадом вместе с самим пользователем.
+    """
+    updated = UserCounters.objects.filter(user_id=user_id).update(
+        **{name: F(name) + delta for name, delta in deltas.items()}
+    )
+    if not updated and create:
+        recount_user(user_id)
+
+
+def change_comments_count(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def get_user_counters(user):
+    """Свежие счётчики пользователя.
+
+    Читаются отдельным запросом, а не через user.counters: тот
+    кешируется на экземпляре пользователя. Чтение ничего не пишет:
+    если строки нет, отдаются нулевые счётчики, а восстанавливает их
+    recount_counters. Пользователя из устаревшего кеша уже нет — 404.
+    """
+    try:
+        return UserCounters.objects.get(user_id=user.pk)
+    except UserCounters.DoesNotExist:
+        if not User.objects.filter(pk=user.pk).exists():
+            raise Http404
+        return UserCounters(user_id=user.pk)
+
+
+def _count(queryset, field, outer='pk'):
+    """Подзапрос числа строк queryset, ссылающихся на внешнюю строку."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def recount_all():
+    """Пересчитывает все счётчики пакетно, по одному UPDATE на таблицу."""
+    UserCounters.objects.bulk_create(
+        [
+            UserCounters(user_id=user_id)
+            for user_id in User.objects.filter(
+                counters__isnull=True
+            ).values_list('pk', flat=True).iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+    UserCounters.objects.update(
+        posts_count=_count(Post.objects.all(), 'author', 'user'),
+        followers_count=_count(Follow.objects.all(), 'author', 'user'),
+        following_count=_count(Follow.objects.all(), 'user', 'user'),
+    )
+    Post.objects.update(comments_count=_count(Comment.objects.all(), 'post'))
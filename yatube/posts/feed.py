@@ -0,0 +1,165 @@
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import FeedItem, Follow, Post, UserCounters
+from .rendering import FEED_DEFERRED
+from yatube.settings import (
+    FEED_BACKFILL_SIZE, FEED_FANOUT_LIMIT, FEED_PULL_HYSTERESIS
+)
+
+
+FEED_KEYS = ('feed_date', 'feed_post')
+
+
+def fan_out_post(post):
+    """Раскладывает новый пост по лентам подписчиков автора.
+
+    Посты авторов, у которых подписчиков стало больше FEED_FANOUT_LIMIT,
+    не раскладываются: их ленты дочитывают при чтении (pull).
+    """
+    if is_pulled_author(post.author_id):
+        return
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=user_id, post=post, pub_date=post.pub_date)
+            for user_id in Follow.objects.filter(
+                author=post.author_id
+            ).values_list('user_id', flat=True)
+        ],
+        ignore_conflicts=True
+    )
+
+
+def backfill_follow(follow):
+    """Добавляет в ленту подписчика последние посты нового автора."""
+    if is_pulled_author(follow.author_id):
+        return
+    posts = (
+        Post.objects.filter(author=follow.author_id)
+        .order_by('-pub_date')
+        .values_list('id', 'pub_date')[:FEED_BACKFILL_SIZE]
+    )
+    FeedItem.objects.bulk_create(
+        [
+            FeedItem(user_id=follow.user_id, post_id=post_id,
+                     pub_date=pub_date)
+            for post_id, pub_date in posts
+        ],
+        ignore_conflicts=True
+    )
+
+
+def trim_unfollow(follow):
+    """Убирает из ленты посты автора, от которого отписались."""
+    FeedItem.objects.filter(
+        user=follow.user_id,
+        post__author=follow.author_id
+    ).delete()
+
+
+def enter_pull(author_id):
+    """Переводит автора на дочитывание, когда подписчиков слишком много."""
+    UserCounters.objects.filter(
+        user=author_id,
+        followers_count__gt=FEED_FANOUT_LIMIT,
+        pulled_since__isnull=True
+    ).update(pulled_since=timezone.now())
+
+
+def is_pulled_author(author_id):
+    return UserCounters.objects.filter(
+        user=author_id,
+        pulled_since__isnull=False
+    ).exists()
+
+
+def _backfill_author(author_id, since):
+    """Раскладывает подписчикам посты автора за время дочитывания.
+
+    Подписавшиеся за это время не получили и старых постов автора:
+    им раскладываются FEED_BACKFILL_SIZE последних, как при подписке.
+    """
+    ops = connection.ops
+    feed = FeedItem._meta.db_table
+    follow = Follow._meta.db_table
+    post = Post._meta.db_table
+    insert = f'{ops.insert_statement(ignore_conflicts=True)} {feed}'
+    suffix = ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+            f'CROSS JOIN (SELECT id, pub_date FROM {post} '
+            f'WHERE author_id = %s AND pub_date < %s '
+            f'ORDER BY pub_date DESC, id DESC LIMIT %s) p '
+            f'WHERE f.author_id = %s AND NOT EXISTS ('
+            f'SELECT 1 FROM {feed} i JOIN {post} o ON o.id = i.post_id '
+            f'WHERE i.user_id = f.user_id AND o.author_id = f.author_id'
+            f') {suffix}',
+            [author_id, since, FEED_BACKFILL_SIZE, author_id]
+        )
+        cursor.execute(
+            f'{insert} (user_id, post_id, pub_date) '
+            f'SELECT f.user_id, p.id, p.pub_date FROM {follow} f '
+            f'CROSS JOIN (SELECT id, pub_date FROM {post} '
+            f'WHERE author_id = %s AND pub_date >= %s '
+            f'ORDER BY pub_date DESC, id DESC LIMIT %s) p '
+            f'WHERE f.author_id = %s {suffix}',
+            [author_id, since, FEED_BACKFILL_SIZE, author_id]
+        )
+
+
+def release_pulled_authors():
+    """Возвращает на раскладку авторов, потерявших подписчиков.
+
+    Автор уходит с дочитывания, только когда подписчиков стало не больше
+    FEED_FANOUT_LIMIT - FEED_PULL_HYSTERESIS, так что отписки у самой
+    границы ничего не пересобирают. Каждый автор переводится в своей
+    транзакции: флаг снимается до раскладки, и пост, опубликованный
+    параллельно, либо попадёт в раскладку, либо разложится сам.
+    """
+    released = 0
+    authors = UserCounters.objects.filter(
+        pulled_since__isnull=False,
+        followers_count__lte=FEED_FANOUT_LIMIT - FEED_PULL_HYSTERESIS
+    ).values_list('user_id', 'pulled_since')
+    for author_id, since in authors.iterator():
+        with transaction.atomic():
+            if not UserCounters.objects.filter(
+                user=author_id,
+                pulled_since=since,
+                followers_count__lte=FEED_FANOUT_LIMIT - FEED_PULL_HYSTERESIS
+            ).update(pulled_since=None):
+                continue
+            _backfill_author(author_id, since)
+        released += 1
+    return released
+
+
+def pulled_authors(user):
+    """Популярные авторы из подписок, чьи посты читаются напрямую."""
+    return Follow.objects.filter(
+        user=user,
+        author__counters__pulled_since__isnull=False
+    ).values('author')
+
+
+def get_feed_sources(user):
+    """Источники ленты подписок с общими ключами (feed_date, feed_post).
+
+    Основной источник — индексированный диапазон записей FeedItem
+    пользователя; второй дочитывает посты популярных авторов.
+    """
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    )
+    inbox = posts.filter(feed_items__user=user).annotate(
+        feed_date=F('feed_items__pub_date'),
+        feed_post=F('feed_items__post'),
+    )
+    pulled = posts.filter(author__in=pulled_authors(user)).annotate(
+        feed_date=F('pub_date'),
+        feed_post=F('id'),
+    )
+    return [inbox, pulled]
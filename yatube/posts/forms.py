@@ -1,12 +1,61 @@
 from django import forms
+from django.template.defaultfilters import filesizeformat
 from .models import Post, Comment
+from yatube.settings import POST_IMAGE_MAX_PIXELS, UPLOAD_MAX_BYTES
+
+
+def file_too_large():
+    return forms.ValidationError(
+        'Файл больше %s' % filesizeformat(UPLOAD_MAX_BYTES),
+        code='file_too_large'
+    )
+
+
+class BoundedImageField(forms.ImageField):
+    """Картинка с ограничением размера файла и числа пикселей.
+
+    Оба ограничения проверяются до декодирования: размер — по загрузке,
+    пиксели — по заголовку, который Pillow читает при открытии.
+    """
+
+    def to_python(self, data):
+        if data and data.size > UPLOAD_MAX_BYTES:
+            raise file_too_large()
+        image_file = super().to_python(data)
+        if image_file is None:
+            return None
+        width, height = image_file.image.size
+        if width * height > POST_IMAGE_MAX_PIXELS:
+            raise forms.ValidationError(
+                'Слишком большое разрешение: %(width)s×%(height)s',
+                code='too_many_pixels',
+                params={'width': width, 'height': height}
+            )
+        return image_file
 
 
 class PostForm(forms.ModelForm):
+    """Форма поста.
+
+    rejected — поля, загрузку которых оборвал BoundedUploadHandler:
+    файла в них нет, но пользователь должен увидеть ошибку.
+    """
+
+    def __init__(self, *args, rejected=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rejected = rejected
+
+    def clean(self):
+        for name in self.rejected:
+            self.add_error(name, file_too_large())
+        return super().clean()
 
     class Meta:
         model = Post
         fields = ('text', 'group', 'image',)
+        field_classes = {
+            'image': BoundedImageField,
+        }
         help_texts = {
             'text': 'Текст поста',
             'group': 'Группа поста',
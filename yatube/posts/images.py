@@ -0,0 +1,30 @@
+from PIL import Image, ImageOps
+
+
+def normalize_image(path, max_side, quality):
+    """Уменьшает оригинал до max_side и убирает метаданные (EXIF и т.п.).
+
+    Функция не зависит от Django и выполняется в отдельном процессе.
+    JPEG декодируется сразу в уменьшенном масштабе через draft(),
+    поэтому память не растёт с разрешением исходного снимка.
+    Возвращает True, если файл был перезаписан.
+    """
+    with Image.open(path) as image:
+        image_format = image.format
+        has_metadata = bool(
+            image.getexif() or image.info.get('icc_profile')
+            or image.info.get('exif')
+        )
+        if max(image.size) <= max_side and not has_metadata:
+            return False
+        image.draft('RGB', (max_side, max_side))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_side, max_side))
+        clean = Image.frombytes(image.mode, image.size, image.tobytes())
+        if image.mode == 'P':
+            clean.putpalette(image.getpalette())
+        options = {'quality': quality} if image_format == 'JPEG' else {}
+        if 'transparency' in image.info:
+            options['transparency'] = image.info['transparency']
+    clean.save(path, image_format, **options)
+    return True
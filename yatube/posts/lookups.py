@@ -0,0 +1,155 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group, User
+from yatube.settings import (
+    LOOKUP_CACHE_SIZE, LOOKUP_LOCAL_TTL, LOOKUP_SHARED_TIMEOUT
+)
+
+
+class LocalCache:
+    """LRU со сроком жизни записей внутри одного процесса."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CachedLookup:
+    """Поиск объекта по уникальному полю через два уровня кеша.
+
+    Сначала локальный LRU процесса, затем общий кеш, затем база.
+    Каждый вызов получает свою копию объекта: Django кеширует на
+    экземпляре связанные объекты, и общий экземпляр из LRU отдавал бы
+    их устаревшими другим запросам. Записи помечены версией из общего
+    кеша; сигналы сохранения и удаления меняют её, и попадание в LRU
+    любого процесса сверяет версию, так что удалённый объект нигде
+    не отдаётся.
+    """
+
+    def __init__(self, name, queryset, field):
+        self.name = name
+        self.queryset = queryset
+        self.field = field
+        self.local = LocalCache(LOOKUP_CACHE_SIZE, LOOKUP_LOCAL_TTL)
+        self.local_hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    def _key(self, value):
+        # В username бывают символы, недопустимые в ключах memcached
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return f'lookup:{self.name}:{digest}'
+
+    def _version(self, key, shared):
+        version = shared.get(f'{key}:version')
+        if version is None:
+            cache.add(f'{key}:version', time.time_ns(), None)
+            version = cache.get(f'{key}:version')
+        return version
+
+    def get(self, value):
+        """Объект или None, если его нет."""
+        key = self._key(value)
+        local = self.local.get(key)
+        if local is not None:
+            version, obj = local
+            if cache.get(f'{key}:version') == version:
+                self.local_hits += 1
+                return copy.deepcopy(obj)
+        shared = cache.get_many([key, f'{key}:version'])
+        version = self._version(key, shared)
+        version_obj = shared.get(key)
+        if version_obj is not None and version_obj[0] == version:
+            self.shared_hits += 1
+            obj = version_obj[1]
+        else:
+            self.misses += 1
+            obj = self.queryset.filter(**{self.field: value}).first()
+            if obj is None:
+                self.local.delete(key)
+                return None
+            cache.set(key, (version, obj), LOOKUP_SHARED_TIMEOUT)
+        self.local.set(key, (version, copy.deepcopy(obj)))
+        return obj
+
+    def get_or_404(self, value):
+        obj = self.get(value)
+        if obj is None:
+            raise Http404(f'{self.name} {value} не найден')
+        return obj
+
+    def invalidate(self, value):
+        key = self._key(value)
+        self.local.delete(key)
+        cache.delete(key)
+        try:
+            cache.incr(f'{key}:version')
+        except ValueError:
+            # Версию создаст следующий промах, и старые записи LRU
+            # с ней не совпадут
+            pass
+
+    def stats(self):
+        return {
+            'local_hits': self.local_hits,
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+        }
+
+
+groups = CachedLookup('group', Group.objects.all(), 'slug')
+# Без пароля и прочих полей: кешу незачем хранить хеш пароля
+users = CachedLookup(
+    'user',
+    User.objects.only('id', 'username', 'first_name', 'last_name'),
+    'username'
+)
+
+
+def lookup_stats():
+    """Счётчики попаданий и промахов всех поисков этого процесса."""
+    return {lookup.name: lookup.stats() for lookup in (groups, users)}
+
+
+def lookup_metrics():
+    """Счётчики поисков для /metrics."""
+    for lookup in (groups, users):
+        for tier, value in lookup.stats().items():
+            labels = (('lookup', lookup.name), ('tier', tier))
+            yield 'yatube_lookup_total', labels, value
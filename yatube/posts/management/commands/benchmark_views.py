@@ -0,0 +1,188 @@
+import json
+import math
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+from posts.models import Group, Post, User
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+@contextmanager
+def private_caches():
+    """Подменяет кеши командой на время замеров.
+
+    Кеши SQLite переносятся во временный каталог с теми же настройками:
+    очистка перед холодным запросом не трогает общий кеш воркеров.
+    Остальные кеши заменяются локальными в памяти процесса.
+    """
+    directory = tempfile.mkdtemp()
+    private = {}
+    for alias, config in settings.CACHES.items():
+        if config['BACKEND'] == 'core.cache.sqlite.SQLiteCache':
+            location = os.path.join(directory, f'{alias}.sqlite3')
+            private[alias] = {**config, 'LOCATION': location}
+        else:
+            private[alias] = {
+                **config,
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'private-{alias}',
+            }
+    try:
+        with override_settings(CACHES=private):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def sample_pages():
+    """Основные страницы на самых тяжёлых объектах базы.
+
+    Отдаёт тройки (имя, адрес, пользователь для входа или None).
+    """
+    yield 'index', reverse('posts:index'), None
+    group = (
+        Group.objects.annotate(total=Count('posts'))
+        .order_by('-total').first()
+    )
+    if group:
+        yield 'group_posts', reverse(
+            'posts:group_posts', args=[group.slug]
+        ), None
+    author = (
+        User.objects.filter(counters__isnull=False)
+        .order_by('-counters__followers_count').first()
+    )
+    if author:
+        yield 'profile', reverse(
+            'posts:profile', args=[author.username]
+        ), None
+    post = Post.objects.order_by('-comments_count').first()
+    if post:
+        yield 'post_detail', reverse(
+            'posts:post_detail', args=[post.pk]
+        ), None
+    reader = (
+        User.objects.annotate(following_total=Count('follower'))
+        .order_by('-following_total').first()
+    )
+    if reader:
+        yield 'follow_index', reverse('posts:follow_index'), reader
+
+
+class Command(BaseCommand):
+    help = 'Замеряет время, число запросов и объём ответа основных страниц'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument(
+            '--cold', action='store_true',
+            help='Очищать кеш перед каждым запросом'
+        )
+        parser.add_argument('--baseline', help='JSON-файл с эталоном')
+        parser.add_argument(
+            '--save', action='store_true',
+            help='Записать результаты в --baseline вместо сравнения'
+        )
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост p95 относительно эталона'
+        )
+
+    def handle(self, *args, **options):
+        client = Client()
+        results = {}
+        with private_caches():
+            for name, url, user in sample_pages():
+                client.logout()
+                if user is not None:
+                    client.force_login(user)
+                results[name] = self.measure(client, url, options)
+        self.print_results(results)
+        baseline = options['baseline']
+        if baseline and options['save']:
+            with open(baseline, 'w') as file:
+                json.dump(results, file, indent=2)
+            self.stdout.write(
+                self.style.SUCCESS(f'Эталон записан в {baseline}')
+            )
+        elif baseline:
+            with open(baseline) as file:
+                regressions = self.compare(
+                    json.load(file), results, options['tolerance']
+                )
+            if regressions:
+                raise CommandError('Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('Регрессий нет'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Замеры закончены'))
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        timings, queries, sizes = [], [], []
+        for _ in range(options['requests']):
+            if options['cold']:
+                cache.clear()
+            with QueryRecorder() as recorder:
+                start = time.perf_counter()
+                response = client.get(url)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                raise CommandError(f'{url}: ответ {response.status_code}')
+            queries.append(len(recorder))
+            sizes.append(len(response.content))
+        return {
+            'url': url,
+            'p50': round(percentile(timings, 50), 2),
+            'p95': round(percentile(timings, 95), 2),
+            'p99': round(percentile(timings, 99), 2),
+            'queries': max(queries),
+            'bytes': max(sizes),
+        }
+
+    def print_results(self, results):
+        self.stdout.write(
+            f'{"страница":<14}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"запросы":>9}{"байты":>10}'
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<14}{result["p50"]:>9}{result["p95"]:>9}'
+                f'{result["p99"]:>9}{result["queries"]:>9}'
+                f'{result["bytes"]:>10}'
+            )
+
+    def compare(self, baseline, results, tolerance):
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result['p95'] > before['p95'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {before["p95"]} -> {result["p95"]} мс'
+                )
+            if result['queries'] > before['queries']:
+                regressions.append(
+                    f'{name}: запросов {before["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+        return regressions
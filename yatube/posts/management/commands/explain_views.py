@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+
+from core.queries import QueryRecorder, explain, plan_problems
+from .benchmark_views import private_caches, sample_pages
+
+
+class Command(BaseCommand):
+    help = 'Печатает план выполнения каждого запроса основных страниц'
+
+    def handle(self, *args, **options):
+        with private_caches():
+            problems = self.explain_pages()
+        if problems:
+            self.stdout.write(self.style.WARNING(
+                f'Шагов без подходящего индекса: {problems}'
+            ))
+        else:
+            self.stdout.write(
+                self.style.SUCCESS('Все запросы идут по индексам')
+            )
+
+    def explain_pages(self):
+        client = Client()
+        problems = 0
+        for name, url, user in sample_pages():
+            client.logout()
+            if user is not None:
+                client.force_login(user)
+            cache.clear()
+            with QueryRecorder() as recorder:
+                client.get(url)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} {url}'))
+            for query in recorder.queries:
+                if not query['sql'].lstrip().upper().startswith('SELECT'):
+                    continue
+                plan = explain(query['sql'], query['params'], query['alias'])
+                bad = plan_problems(plan)
+                problems += len(bad)
+                self.stdout.write(f'  {query["sql"]}')
+                for step in plan:
+                    line = f'    {step}'
+                    if step in bad:
+                        line = self.style.WARNING(line)
+                    self.stdout.write(line)
+        return problems
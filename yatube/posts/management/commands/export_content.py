@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts.bulk import export_records, open_content, write_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает пользователей, группы, посты, комментарии и подписки'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', help='Файл JSONL; с расширением .gz пишется сжатым'
+        )
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        with open_content(options['output'], 'wt') as file:
+            count = write_records(
+                file, export_records(options['chunk_size'])
+            )
+        self.stdout.write(self.style.SUCCESS(f'Выгружено строк: {count}'))
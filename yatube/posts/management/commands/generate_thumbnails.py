@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import process_post
+from yatube.settings import POST_THUMBNAIL_WORKERS
+
+
+class Command(BaseCommand):
+    help = 'Готовит миниатюры для уже загруженных картинок постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Обработать и посты, у которых миниатюры уже готовы'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=POST_THUMBNAIL_WORKERS,
+            help='Число параллельных обработчиков'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='')
+        if not options['all']:
+            posts = posts.filter(thumbnails_ready=False)
+        post_ids = posts.values_list('pk', flat=True).iterator()
+        done = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for ready in executor.map(process_post, post_ids):
+                if ready:
+                    done += 1
+                else:
+                    failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Миниатюры готовы: {done}, пропущено: {failed}'
+        ))
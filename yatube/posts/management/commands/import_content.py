@@ -0,0 +1,38 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.bulk import (
+    ContentImporter, open_content, read_records, rebuild_derived
+)
+
+
+class Command(BaseCommand):
+    help = 'Загружает выгрузку export_content, продолжая прерванную загрузку'
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help='Файл JSONL или JSONL.gz')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--name',
+            help='Имя загрузки для продолжения, по умолчанию путь к файлу'
+        )
+
+    def handle(self, *args, **options):
+        name = options['name'] or os.path.abspath(options['input'])
+        importer = ContentImporter(name, options['batch_size'])
+        if importer.done:
+            self.stdout.write(f'Файл уже загружен под именем {name}')
+            return
+        start = time.perf_counter()
+        with open_content(options['input']) as file:
+            importer.run(read_records(file))
+        rebuild_derived()
+        elapsed = time.perf_counter() - start
+        rate = importer.imported / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено строк: {importer.imported}, пропущено: '
+            f'{importer.skipped}, {rate:.0f} строк в минуту. '
+            f'Миниатюры строит generate_thumbnails'
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts.feed import release_pulled_authors
+
+
+class Command(BaseCommand):
+    help = (
+        'Возвращает на раскладку по лентам авторов, у которых стало '
+        'меньше подписчиков'
+    )
+
+    def handle(self, *args, **options):
+        released = release_pulled_authors()
+        self.stdout.write(self.style.SUCCESS(
+            f'Авторов возвращено на раскладку: {released}'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Comment, Post
+from posts.rendering import backfill
+
+
+class Command(BaseCommand):
+    help = 'Заполняет HTML и начало текста постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать и уже заполненные тексты'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        done = {
+            model._meta.verbose_name_plural: backfill(
+                model, options['batch_size'], options['all']
+            )
+            for model in (Post, Comment)
+        }
+        self.stdout.write(self.style.SUCCESS(', '.join(
+            f'{name}: {count}' for name, count in done.items()
+        )))
@@ -0,0 +1,148 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts.bulk import keep_auto_now, rebuild_derived
+from posts.models import Comment, Follow, Group, Post, User
+from posts.rendering import render_text
+
+
+class Command(BaseCommand):
+    help = 'Заполняет базу тестовыми пользователями, постами и подписками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=20000)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=50000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя'
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.2,
+            help='Показатель степенного закона популярности авторов'
+        )
+        parser.add_argument('--days', type=int, default=365)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prefix', default='seed')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.days = options['days']
+        prefix = options['prefix']
+        with transaction.atomic():
+            users = self.create_users(prefix, options['users'])
+            groups = self.create_groups(prefix, options['groups'])
+            # Популярность автора по рангу: вес 1 / rank ** alpha
+            weights = [
+                1 / (rank ** options['alpha'])
+                for rank in range(1, len(users) + 1)
+            ]
+            posts = self.create_posts(
+                users, weights, groups, options['posts']
+            )
+            self.create_comments(users, posts, weights, options['comments'])
+            self.create_follows(users, weights, options['follows'])
+            rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано: пользователей {len(users)}, групп {len(groups)}, '
+            f'постов {len(posts)}'
+        ))
+
+    def random_date(self):
+        return self.now - timedelta(
+            seconds=self.random.randrange(self.days * 24 * 3600)
+        )
+
+    def bulk(self, model, objects):
+        if model in (Post, Comment):
+            for obj in objects:
+                render_text(obj)
+        model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True
+        )
+
+    def create_users(self, prefix, count):
+        password = make_password(None)
+        self.bulk(User, [
+            User(username=f'{prefix}{n}', password=password,
+                 first_name='Автор', last_name=str(n))
+            for n in range(count)
+        ])
+        return list(
+            User.objects.filter(username__startswith=prefix)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+    def create_groups(self, prefix, count):
+        self.bulk(Group, [
+            Group(title=f'Группа {n}', slug=f'{prefix}-group-{n}',
+                  description=f'Описание группы {n}')
+            for n in range(count)
+        ])
+        return list(
+            Group.objects.filter(slug__startswith=f'{prefix}-group-')
+            .values_list('pk', flat=True)
+        )
+
+    def create_posts(self, users, weights, groups, count):
+        authors = self.random.choices(users, weights, k=count)
+        with keep_auto_now(Post._meta.get_field('pub_date')):
+            for start in range(0, count, self.batch_size):
+                self.bulk(Post, [
+                    Post(
+                        author_id=author_id,
+                        text=f'Пост {start + n} автора {author_id}',
+                        group_id=(
+                            self.random.choice(groups)
+                            if groups and self.random.random() < 0.5
+                            else None
+                        ),
+                        pub_date=self.random_date(),
+                    )
+                    for n, author_id in enumerate(
+                        authors[start:start + self.batch_size]
+                    )
+                ])
+        return list(Post.objects.filter(
+            author__in=users
+        ).values_list('pk', flat=True))
+
+    def create_comments(self, users, posts, weights, count):
+        if not posts:
+            return
+        with keep_auto_now(Comment._meta.get_field('created')):
+            for start in range(0, count, self.batch_size):
+                size = min(self.batch_size, count - start)
+                authors = self.random.choices(users, weights, k=size)
+                self.bulk(Comment, [
+                    Comment(
+                        post_id=self.random.choice(posts),
+                        author_id=author_id,
+                        text='Комментарий',
+                        created=self.random_date(),
+                    )
+                    for author_id in authors
+                ])
+
+    def create_follows(self, users, weights, per_user):
+        follows = []
+        for user_id in users:
+            authors = set(self.random.choices(users, weights, k=per_user))
+            authors.discard(user_id)
+            follows.extend(
+                Follow(user_id=user_id, author_id=author_id)
+                for author_id in authors
+            )
+            if len(follows) >= self.batch_size:
+                self.bulk(Follow, follows)
+                follows = []
+        self.bulk(Follow, follows)
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+def mark_existing_ready(apps, schema_editor):
+    """Старые картинки остаются на ленивой генерации sorl-thumbnail.
+
+    Заранее их можно подготовить командой generate_thumbnails --all.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(image='').update(thumbnails_ready=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails_ready',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Миниатюры готовы'),
+        ),
+        migrations.RunPython(mark_existing_ready, migrations.RunPython.noop),
+    ]
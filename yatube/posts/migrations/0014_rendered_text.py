@@ -0,0 +1,42 @@
+# Generated by Django 2.2.19 on 2026-10-18 20:41
+
+from django.db import migrations, models
+
+from posts.rendering import backfill
+
+
+def render_existing(apps, schema_editor):
+    """Заново нарисовать тексты можно командой render_texts --all."""
+    for name in ('Post', 'Comment'):
+        backfill(apps.get_model('posts', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=300, verbose_name='Начало текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(render_existing, migrations.RunPython.noop),
+    ]
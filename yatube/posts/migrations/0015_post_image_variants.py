@@ -0,0 +1,29 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:05
+
+from django.db import migrations, models
+
+
+def reset_ready(apps, schema_editor):
+    """Страницы больше не генерируют миниатюры на лету.
+
+    Пока варианты не готовы, показывается заглушка; подготовить их
+    можно командой generate_thumbnails.
+    """
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.exclude(image='').update(thumbnails_ready=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_rendered_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, verbose_name='Варианты картинки'),
+        ),
+        migrations.RunPython(reset_ready, migrations.RunPython.noop),
+    ]
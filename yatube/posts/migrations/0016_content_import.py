@@ -0,0 +1,28 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentImport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255, verbose_name='Загрузка')),
+                ('line', models.PositiveIntegerField(default=0, verbose_name='Загружено строк')),
+                ('maps', models.TextField(blank=True, verbose_name='Соответствия id')),
+                ('done', models.BooleanField(default=False, verbose_name='Завершена')),
+            ],
+            options={
+                'verbose_name': 'Пачка загрузки',
+                'verbose_name_plural': 'Пачки загрузки',
+                'ordering': ('pk',),
+            },
+        ),
+    ]
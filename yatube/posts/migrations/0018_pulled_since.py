@@ -0,0 +1,40 @@
+# Generated by Django 2.2.19 on 2026-10-18 21:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_pulled(apps, schema_editor):
+    """Отмечает уже популярных авторов дочитываемыми со дня регистрации.
+
+    Когда дочитываются их посты, неизвестно, поэтому при возврате
+    на раскладку берутся все последние посты.
+    """
+    UserCounters = apps.get_model('posts', 'UserCounters')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    UserCounters.objects.filter(
+        followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).update(
+        pulled_since=models.Subquery(
+            User.objects.filter(pk=models.OuterRef('user')).values(
+                'date_joined'
+            )
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0017_cache_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercounters',
+            name='pulled_since',
+            field=models.DateTimeField(blank=True, help_text='Посты автора не раскладываются, а дочитываются лентой', null=True, verbose_name='Дочитывается с'),
+        ),
+        migrations.RunPython(mark_pulled, migrations.RunPython.noop),
+    ]
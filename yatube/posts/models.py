@@ -1,6 +1,9 @@
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .rendering import render_text
+from yatube.settings import TEXT_EXCERPT_LENGTH
+
 
 User = get_user_model()
 
@@ -19,6 +22,17 @@ class Post(models.Model):
         'Текст поста',
         help_text='Введите текст поста'
     )
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=TEXT_EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
@@ -42,16 +56,86 @@ class Post(models.Model):
         'Картинка',
         upload_to='posts/',
         blank=True
-    ) 
+    )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False
+    )
+    version = models.PositiveIntegerField(
+        'Версия',
+        default=0,
+        editable=False
+    )
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы',
+        default=False,
+        editable=False
+    )
+    image_variants = models.TextField(
+        'Варианты картинки',
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_pub_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'image' in instance.__dict__:
+            instance._loaded_image = instance.__dict__['image'] or ''
+        return instance
+
+    @property
+    def image_changed(self):
+        """Картинка поменялась с момента загрузки поста из базы."""
+        if self._state.adding:
+            return bool(self.image)
+        if not hasattr(self, '_loaded_image'):
+            return False
+        return (self.image.name or '') != self._loaded_image
+
+    def save(self, *args, **kwargs):
+        """Каждое сохранение существующего поста увеличивает версию.
+
+        Новая картинка сбрасывает флаг готовности и варианты
+        миниатюр, новый текст заново рисуется в HTML.
+        """
+        changed = {'version'}
+        if not self._state.adding:
+            self.version += 1
+        self._image_changed = self.image_changed
+        if self._image_changed:
+            self.thumbnails_ready = False
+            self.image_variants = ''
+            changed.update(('thumbnails_ready', 'image_variants'))
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not self._state.adding:
+            kwargs['update_fields'] = render_text(
+                self, {*update_fields, *changed}
+            )
+        else:
+            render_text(self)
+        super().save(*args, **kwargs)
+        self._loaded_image = self.image.name or ''
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -74,15 +158,39 @@ class Comment(models.Model):
         'Текст',
         help_text='Текст нового комментария'
     )
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
+    excerpt = models.CharField(
+        'Начало текста',
+        max_length=TEXT_EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-created',)
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['post', '-created', '-id'],
+                name='comment_post_created_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        """Текст комментария заново рисуется в HTML."""
+        kwargs['update_fields'] = render_text(
+            self, kwargs.get('update_fields')
+        )
+        super().save(*args, **kwargs)
+
 class Follow(models.Model):
     user = models.ForeignKey(
         User,
@@ -98,6 +206,12 @@ class Follow(models.Model):
 
     class Meta:
         ordering = ['-author']
+        indexes = [
+            models.Index(
+                fields=['author', 'user'],
+                name='follow_author_user_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],
@@ -107,3 +221,103 @@ class Follow(models.Model):
 
     def __str__(self):
         return f'{self.user} подписался на {self.author}'
+
+
+class UserCounters(models.Model):
+    """Счётчики пользователя, обновляемые вместе с записями."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='counters',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField('Число постов', default=0)
+    followers_count = models.PositiveIntegerField(
+        'Число подписчиков',
+        default=0
+    )
+    following_count = models.PositiveIntegerField('Число подписок', default=0)
+    pulled_since = models.DateTimeField(
+        'Дочитывается с',
+        null=True,
+        blank=True,
+        help_text='Посты автора не раскладываются, а дочитываются лентой'
+    )
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return f'Счётчики {self.user}'
+
+
+class FeedItem(models.Model):
+    """Запись ленты подписок, разложенная подписчику при публикации."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_items',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='feed_user_pub_date_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_feed_item'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.post} в ленте {self.user}'
+
+
+class CacheVersion(models.Model):
+    """Версия кэшируемых данных, которая реплицируется вместе с ними."""
+    name = models.CharField('Имя', max_length=255, primary_key=True)
+    version = models.BigIntegerField('Версия')
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэша'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
+
+
+class ContentImport(models.Model):
+    """Пачка import_content, записанная в одной транзакции со строками.
+
+    По этим записям прерванная загрузка продолжается с того места,
+    которое действительно зафиксировано в базе.
+    """
+    name = models.CharField('Загрузка', max_length=255, db_index=True)
+    line = models.PositiveIntegerField('Загружено строк', default=0)
+    maps = models.TextField('Соответствия id', blank=True)
+    done = models.BooleanField('Завершена', default=False)
+
+    class Meta:
+        ordering = ('pk',)
+        verbose_name = 'Пачка загрузки'
+        verbose_name_plural = 'Пачки загрузки'
+
+    def __str__(self):
+        return f'{self.name}: {self.line}'
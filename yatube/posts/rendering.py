@@ -0,0 +1,51 @@
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from yatube.settings import TEXT_EXCERPT_LENGTH
+
+
+RENDERED_FIELDS = ('text_html', 'excerpt')
+# Лентам нужно только начало текста, странице поста — готовый HTML
+FEED_DEFERRED = ('text', 'text_html')
+DETAIL_DEFERRED = ('text', 'excerpt')
+
+
+def render_text(instance, update_fields=None):
+    """Заполняет HTML и начало текста поста или комментария.
+
+    Возвращает update_fields с добавленными полями; если текст
+    не загружен или не сохраняется, ничего не меняет.
+    """
+    if 'text' in instance.get_deferred_fields():
+        return update_fields
+    if update_fields is not None and 'text' not in update_fields:
+        return update_fields
+    instance.text_html = linebreaksbr(instance.text, autoescape=True)
+    instance.excerpt = Truncator(' '.join(instance.text.split())).chars(
+        TEXT_EXCERPT_LENGTH
+    )
+    if update_fields is None:
+        return None
+    return {*update_fields, *RENDERED_FIELDS}
+
+
+def backfill(model, batch_size=1000, everything=False):
+    """Заполняет сохранённый HTML у строк, записанных в обход save().
+
+    Идёт по возрастанию pk пачками по batch_size; everything —
+    перерисовать и уже заполненные строки.
+    """
+    rows = model.objects.order_by('pk').only('pk', 'text')
+    if not everything:
+        rows = rows.filter(text_html='')
+    done = 0
+    last_pk = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last_pk)[:batch_size])
+        if not batch:
+            return done
+        for obj in batch:
+            render_text(obj)
+        model.objects.bulk_update(batch, RENDERED_FIELDS)
+        done += len(batch)
+        last_pk = batch[-1].pk
@@ -0,0 +1,127 @@
+import re
+from functools import lru_cache
+
+from django.db import connections, router, transaction
+from django.utils.module_loading import import_string
+
+from .models import Post
+from .rendering import FEED_DEFERRED
+from yatube.settings import POSTS_SEARCH_BACKEND
+
+
+WORDS = re.compile(r'\w+')
+
+
+class SearchBackend:
+    """Поисковый индекс постов.
+
+    Бэкенд хранит для каждого поста его текст и по запросу возвращает
+    id постов в порядке релевантности.
+    """
+
+    def index(self, post):
+        raise NotImplementedError
+
+    def remove(self, post_id):
+        raise NotImplementedError
+
+    def rebuild(self):
+        raise NotImplementedError
+
+    def search(self, query, offset, limit):
+        raise NotImplementedError
+
+
+class SimpleSearchBackend(SearchBackend):
+    """Поиск без индекса для баз без полнотекстового поиска."""
+
+    def index(self, post):
+        pass
+
+    def remove(self, post_id):
+        pass
+
+    def rebuild(self):
+        pass
+
+    def search(self, query, offset, limit):
+        words = WORDS.findall(query)
+        if not words:
+            return []
+        posts = Post.objects.all()
+        for word in words:
+            posts = posts.filter(text__icontains=word)
+        return list(
+            posts.values_list('pk', flat=True)[offset:offset + limit]
+        )
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс на виртуальной таблице SQLite FTS5, rowid — id поста.
+
+    Индекс лежит в той же базе, что и посты: пишется туда, куда роутер
+    пишет Post, и читается оттуда, откуда он читает Post. Пересборка
+    идёт в одной транзакции, чтобы поиск не видел пустого индекса.
+    """
+
+    table = 'posts_post_fts'
+
+    def index(self, post):
+        # REPLACE заменяет строку с тем же rowid одним запросом
+        with connections[router.db_for_write(Post)].cursor() as cursor:
+            cursor.execute(
+                f'INSERT OR REPLACE INTO {self.table} (rowid, text) '
+                f'VALUES (%s, %s)',
+                [post.pk, post.text]
+            )
+
+    def remove(self, post_id):
+        with connections[router.db_for_write(Post)].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE rowid = %s', [post_id]
+            )
+
+    def rebuild(self):
+        using = router.db_for_write(Post)
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute(f'DELETE FROM {self.table}')
+                cursor.execute(
+                    f'INSERT INTO {self.table} (rowid, text) '
+                    f'SELECT id, text FROM {Post._meta.db_table}'
+                )
+
+    @staticmethod
+    def match_expression(query):
+        """Слова запроса как префиксы в кавычках.
+
+        Кавычки отключают операторы FTS5, на которых ломается разбор
+        пользовательского ввода.
+        """
+        return ' '.join(f'"{word}"*' for word in WORDS.findall(query))
+
+    def search(self, query, offset, limit):
+        expression = self.match_expression(query)
+        if not expression:
+            return []
+        with connections[router.db_for_read(Post)].cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s '
+                f'ORDER BY rank, rowid DESC LIMIT %s OFFSET %s',
+                [expression, limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    return import_string(POSTS_SEARCH_BACKEND)()
+
+
+def search_posts(query, offset, limit):
+    """Посты по запросу в порядке релевантности."""
+    ids = get_search_backend().search(query, offset, limit)
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    ).in_bulk(ids)
+    return [posts[pk] for pk in ids if pk in posts]
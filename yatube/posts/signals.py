@@ -0,0 +1,121 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import bump_version
+from .counters import change_comments_count, change_user_counters
+from .feed import (
+    backfill_follow, enter_pull, fan_out_post, trim_unfollow
+)
+from .lookups import groups, users
+from .models import Comment, Follow, Group, Post, User, UserCounters
+from .search import get_search_backend
+from .thumbnails import schedule_thumbnails
+from core.db.router import use_primary
+
+
+NAME_FIELDS = {'username', 'first_name', 'last_name'}
+LOOKUPS = {User: users, Group: groups}
+
+
+@receiver(pre_save, sender=User)
+@receiver(pre_save, sender=Group)
+def remember_lookup_value(sender, instance, raw=False, update_fields=None,
+                          **kwargs):
+    """Запоминает прежний slug или username, чтобы сбросить и его."""
+    field = LOOKUPS[sender].field
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    instance._lookup_value = sender.objects.filter(
+        pk=instance.pk
+    ).values_list(field, flat=True).first()
+
+
+def invalidate_lookup(instance):
+    lookup = LOOKUPS[type(instance)]
+    lookup.invalidate(getattr(instance, lookup.field))
+    previous = getattr(instance, '_lookup_value', None)
+    if previous is not None:
+        lookup.invalidate(previous)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, update_fields=None,
+               **kwargs):
+    if created and not raw:
+        UserCounters.objects.get_or_create(user=instance)
+        # Имя могло принадлежать удалённому пользователю
+        invalidate_lookup(instance)
+    elif update_fields is None or NAME_FIELDS & set(update_fields):
+        # Имя автора есть в карточках постов на главной
+        bump_version('index')
+        invalidate_lookup(instance)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_lookup(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    bump_version('index')
+    invalidate_lookup(instance)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    bump_version('index')
+    get_search_backend().index(instance)
+    if instance.image and getattr(instance, '_image_changed', False):
+        schedule_thumbnails(instance.pk)
+    if created:
+        change_user_counters(instance.author_id, posts_count=1)
+        # Реплика может ещё не знать о свежих подписках
+        with use_primary():
+            fan_out_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    bump_version('index')
+    get_search_backend().remove(instance.pk)
+    change_user_counters(
+        instance.author_id, create=False, posts_count=-1
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        change_comments_count(instance.post_id, 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    change_comments_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        change_user_counters(instance.author_id, followers_count=1)
+        change_user_counters(instance.user_id, following_count=1)
+        enter_pull(instance.author_id)
+        with use_primary():
+            backfill_follow(instance)
+        bump_version(f'feed:{instance.user_id}')
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    change_user_counters(
+        instance.author_id, create=False, followers_count=-1
+    )
+    change_user_counters(
+        instance.user_id, create=False, following_count=-1
+    )
+    trim_unfollow(instance)
+    bump_version(f'feed:{instance.user_id}')
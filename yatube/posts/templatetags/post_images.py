@@ -0,0 +1,19 @@
+from django import template
+
+from posts.thumbnails import get_post_picture
+from yatube.settings import POST_IMAGE_SIZES
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/post_image.html')
+def post_image(post, sizes=POST_IMAGE_SIZES, lazy=True):
+    """Картинка поста в <picture> с вариантами по ширине и формату.
+
+    Пока варианты готовятся, показывается заглушка.
+    """
+    return {
+        'has_image': bool(post.image),
+        'picture': get_post_picture(post),
+        'sizes': sizes,
+        'lazy': lazy,
+    }
@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.models import Comment, FeedItem, Follow, Post, User, UserCounters
+from posts.search import search_posts
+
+
+class SeedContentTests(TestCase):
+    """Тестирование генерации тестовых данных"""
+    def setUp(self):
+        cache.clear()
+
+    def seed(self):
+        call_command(
+            'seed_content', users=30, posts=200, groups=3, comments=100,
+            follows=5, batch_size=50, stdout=StringIO()
+        )
+
+    def test_seed_creates_content_and_derived_data(self):
+        """Генерация заполняет таблицы, счётчики, ленты и поиск"""
+        self.seed()
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertTrue(Follow.objects.exists())
+        author = User.objects.get(username='seed0')
+        self.assertEqual(
+            UserCounters.objects.get(user=author).posts_count,
+            Post.objects.filter(author=author).count()
+        )
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count() > 1, True
+        )
+        follow = Follow.objects.first()
+        self.assertEqual(
+            FeedItem.objects.filter(user=follow.user_id).count(),
+            Post.objects.filter(
+                author__following__user=follow.user_id
+            ).count()
+        )
+        self.assertTrue(search_posts('Пост', 0, 10))
+
+    def test_popular_authors_have_more_followers(self):
+        """Подписки распределены по степенному закону"""
+        self.seed()
+        top = Follow.objects.filter(author__username='seed0').count()
+        tail = Follow.objects.filter(author__username='seed29').count()
+        self.assertGreater(top, tail)
+
+
+class BenchmarkViewsTests(TestCase):
+    """Тестирование замеров страниц"""
+    def setUp(self):
+        cache.clear()
+        call_command(
+            'seed_content', users=10, posts=30, groups=2, comments=20,
+            follows=3, stdout=StringIO()
+        )
+        self.baseline = os.path.join(tempfile.mkdtemp(), 'baseline.json')
+
+    def tearDown(self):
+        if os.path.exists(self.baseline):
+            os.remove(self.baseline)
+        os.rmdir(os.path.dirname(self.baseline))
+
+    def benchmark(self, **options):
+        out = StringIO()
+        call_command(
+            'benchmark_views', requests=3, warmup=1,
+            baseline=self.baseline, stdout=out, **options
+        )
+        return out.getvalue()
+
+    def test_baseline_is_saved_and_compared(self):
+        """Эталон сохраняется, повторный прогон сравнивается с ним"""
+        self.benchmark(save=True)
+        with open(self.baseline) as file:
+            results = json.load(file)
+        self.assertEqual(
+            set(results),
+            {'index', 'group_posts', 'profile', 'post_detail', 'follow_index'}
+        )
+        for result in results.values():
+            self.assertLessEqual(result['p50'], result['p99'])
+        self.assertIn('Регрессий нет', self.benchmark(tolerance=1000))
+
+    def test_query_regression_is_reported(self):
+        """Рост числа запросов относительно эталона — ошибка"""
+        self.benchmark(save=True)
+        with open(self.baseline) as file:
+            results = json.load(file)
+        results['post_detail']['queries'] = 0
+        with open(self.baseline, 'w') as file:
+            json.dump(results, file)
+        with self.assertRaisesMessage(CommandError, 'post_detail: запросов'):
+            self.benchmark(tolerance=1000)
+
+    def test_shared_cache_is_untouched(self):
+        """Холодные замеры очищают только свой кеш"""
+        cache.set('worker-key', 'value')
+        self.benchmark(save=True, cold=True)
+        call_command('explain_views', stdout=StringIO())
+        self.assertEqual(cache.get('worker-key'), 'value')
@@ -0,0 +1,172 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.bulk import ContentImporter, rebuild_feeds
+from posts.models import (
+    Comment, FeedItem, Follow, Group, Post, User, UserCounters
+)
+
+
+class ContentTransferTests(TestCase):
+    """Тестирование выгрузки и загрузки контента"""
+    def setUp(self):
+        cache.clear()
+        self.dir = tempfile.mkdtemp()
+        self.author = User.objects.create_user(
+            username='writer', password='secret'
+        )
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.date = timezone.now() - timedelta(days=30)
+        for n in range(7):
+            post = Post.objects.create(
+                author=self.author, group=self.group, text=f'Пост {n}'
+            )
+            Comment.objects.create(
+                post=post, author=self.reader, text=f'Комментарий {n}'
+            )
+        Post.objects.update(pub_date=self.date)
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def export_and_wipe(self, name):
+        call_command('export_content', self.path(name), stdout=StringIO())
+        User.objects.all().delete()
+        Group.objects.all().delete()
+
+    def assertRestored(self):
+        author = User.objects.get(username='writer')
+        self.assertEqual(Post.objects.filter(author=author).count(), 7)
+        self.assertEqual(Comment.objects.count(), 7)
+        self.assertTrue(Follow.objects.filter(
+            user__username='reader', author=author
+        ).exists())
+        self.assertEqual(Post.objects.filter(group__slug='group').count(), 7)
+        self.assertEqual(
+            set(Post.objects.values_list('pub_date', flat=True)),
+            {self.date}
+        )
+        self.assertEqual(
+            UserCounters.objects.get(user=author).followers_count, 1
+        )
+        self.assertEqual(FeedItem.objects.count(), 7)
+
+    def test_round_trip_gzip(self):
+        """Сжатая выгрузка загружается обратно вместе с датами и связями"""
+        self.export_and_wipe('content.jsonl.gz')
+        out = StringIO()
+        call_command(
+            'import_content', self.path('content.jsonl.gz'), stdout=out
+        )
+        self.assertRestored()
+        self.assertIn('Загружено строк: 18', out.getvalue())
+
+    def test_interrupted_import_resumes(self):
+        """Прерванная загрузка продолжается без повторной вставки"""
+        self.export_and_wipe('content.jsonl')
+        original = ContentImporter._import_batch
+        calls = []
+
+        def fail_on_second(importer, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('обрыв')
+            original(importer, batch)
+
+        with mock.patch.object(
+            ContentImporter, '_import_batch', fail_on_second
+        ), self.assertRaises(RuntimeError):
+            call_command(
+                'import_content', self.path('content.jsonl'),
+                batch_size=5, stdout=StringIO()
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        call_command(
+            'import_content', self.path('content.jsonl'),
+            batch_size=5, stdout=StringIO()
+        )
+        self.assertRestored()
+        out = StringIO()
+        call_command('import_content', self.path('content.jsonl'), stdout=out)
+        self.assertIn('уже загружен', out.getvalue())
+        self.assertEqual(Post.objects.count(), 7)
+
+    def test_state_commits_with_batch(self):
+        """Сбой до записи состояния откатывает и саму пачку"""
+        self.export_and_wipe('content.jsonl')
+        original = ContentImporter._save_state
+        calls = []
+
+        def fail_on_second(importer, **state):
+            calls.append(state)
+            if len(calls) == 2:
+                raise RuntimeError('обрыв')
+            original(importer, **state)
+
+        with mock.patch.object(
+            ContentImporter, '_save_state', fail_on_second
+        ), self.assertRaises(RuntimeError):
+            call_command(
+                'import_content', self.path('content.jsonl'),
+                batch_size=5, stdout=StringIO()
+            )
+        self.assertEqual(Post.objects.count(), 2)
+        call_command(
+            'import_content', self.path('content.jsonl'),
+            batch_size=5, stdout=StringIO()
+        )
+        self.assertRestored()
+
+    def test_users_come_without_credentials(self):
+        """Пользователи переносятся без паролей и флагов персонала"""
+        User.objects.filter(username='writer').update(is_staff=True)
+        self.export_and_wipe('content.jsonl')
+        with open(self.path('content.jsonl'), encoding='utf-8') as file:
+            self.assertNotIn('password', file.read())
+        call_command(
+            'import_content', self.path('content.jsonl'), stdout=StringIO()
+        )
+        author = User.objects.get(username='writer')
+        self.assertFalse(author.has_usable_password())
+        self.assertFalse(author.is_staff)
+
+    def test_rebuilt_feed_is_capped(self):
+        """Пересборка кладёт в ленту только последние посты автора"""
+        newest = Post.objects.order_by('-pub_date', '-id')[:3]
+        with mock.patch('posts.bulk.FEED_BACKFILL_SIZE', 3):
+            rebuild_feeds()
+        self.assertEqual(
+            set(FeedItem.objects.values_list('post_id', flat=True)),
+            {post.pk for post in newest}
+        )
+
+    def test_existing_users_and_groups_are_reused(self):
+        """Пользователи и группы сопоставляются по имени и slug"""
+        call_command(
+            'export_content', self.path('content.jsonl'), stdout=StringIO()
+        )
+        call_command(
+            'import_content', self.path('content.jsonl'), stdout=StringIO()
+        )
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 14)
+        self.assertEqual(Follow.objects.count(), 1)
+        for comment in Comment.objects.select_related('post'):
+            self.assertEqual(comment.text[-1], comment.post.text[-1])
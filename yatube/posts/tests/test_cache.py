@@ -0,0 +1,100 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Group, Post, User
+
+
+class IndexCacheTests(TestCase):
+    """Тестирование кэша главной страницы"""
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(author=self.user, text='Первый пост')
+
+    def test_index_is_cached_for_everyone(self):
+        """Повторная отрисовка главной не читает посты"""
+        self.authorized_client.get(reverse('posts:index'))
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, self.post.text)
+        self.assertContains(response, 'Войти')
+
+    def test_header_is_not_shared(self):
+        """Шапка страницы своя у каждого пользователя"""
+        self.guest_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Пользователь: auth')
+        self.assertContains(response, self.post.text)
+
+    def test_unknown_params_share_index_cache(self):
+        """Посторонние параметры не заводят новых записей кеша главной"""
+        self.guest_client.get(reverse('posts:index') + '?utm=1')
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                reverse('posts:index') + '?utm=2'
+            )
+        self.assertContains(response, self.post.text)
+
+    def test_writes_invalidate_index(self):
+        """Создание, правка и удаление поста сразу видны на главной"""
+        self.guest_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_create'), data={'text': 'Второй пост'}
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Второй пост')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.id}),
+            data={'text': 'Исправленный пост'}
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленный пост')
+        Post.objects.filter(text='Второй пост').delete()
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'Второй пост')
+
+
+class PostCardCacheTests(TestCase):
+    """Тестирование кэша карточек постов"""
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(
+            username='auth', first_name='Лев', last_name='Толстой'
+        )
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.user, text='Первый пост', group=self.group
+        )
+        self.url = reverse(
+            'posts:group_posts', kwargs={'slug': self.group.slug}
+        )
+
+    def test_card_is_reused_until_post_changes(self):
+        """Карточка берётся из кэша, пока пост не сохранён заново"""
+        self.guest_client.get(self.url)
+        Post.objects.filter(pk=self.post.pk).update(text='Тихая правка')
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Первый пост')
+        self.post.refresh_from_db()
+        self.post.save()
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'Тихая правка')
+
+    def test_card_follows_author_name(self):
+        """Смена имени автора обновляет карточку и главную"""
+        self.guest_client.get(self.url)
+        self.guest_client.get(reverse('posts:index'))
+        self.user.first_name = 'Алексей'
+        self.user.save()
+        for url in (self.url, reverse('posts:index')):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertContains(response, 'Алексей Толстой')
@@ -0,0 +1,89 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core.queries import QueryRecorder
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class ConditionalGetTests(TestCase):
+    """Тестирование ответов 304 по ETag"""
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='writer')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Пост'
+        )
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+        self.urls = {
+            'index': reverse('posts:index'),
+            'group': reverse('posts:group_posts', args=[self.group.slug]),
+            'profile': reverse('posts:profile', args=[self.author.username]),
+            'detail': reverse('posts:post_detail', args=[self.post.pk]),
+            'feed': reverse('posts:follow_index'),
+        }
+
+    def etag(self, name, client=None):
+        response = (client or self.reader_client).get(self.urls[name])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('no-cache', response['Cache-Control'])
+        return response['ETag']
+
+    def test_unchanged_pages_return_304(self):
+        """Повторный запрос с тем же ETag получает 304 без тела"""
+        for name, url in self.urls.items():
+            with self.subTest(page=name):
+                etag = self.etag(name)
+                response = self.reader_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_304_skips_page_queries(self):
+        """Для 304 страница не выбирает посты"""
+        etag = self.etag('index', self.client)
+        with QueryRecorder() as recorder:
+            response = self.client.get(
+                self.urls['index'], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(len(recorder), 0)
+
+    def test_changes_update_etag(self):
+        """Правки, комментарии и подписки меняют ETag своих страниц"""
+        before = {name: self.etag(name) for name in self.urls}
+        self.post.text = 'Новый текст'
+        self.post.save()
+        after_edit = {name: self.etag(name) for name in self.urls}
+        for name in ('index', 'group', 'detail'):
+            self.assertNotEqual(before[name], after_edit[name])
+        Comment.objects.create(
+            post=self.post, author=self.reader, text='Комментарий'
+        )
+        self.assertNotEqual(after_edit['detail'], self.etag('detail'))
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertNotEqual(after_edit['feed'], self.etag('feed'))
+        self.assertNotEqual(after_edit['profile'], self.etag('profile'))
+
+    def test_etag_depends_on_user_and_page(self):
+        """Разные пользователи и страницы листания — разные ETag"""
+        self.assertNotEqual(
+            self.etag('index'), self.etag('index', self.client)
+        )
+        response = self.client.get(self.urls['index'] + '?page=2')
+        self.assertNotEqual(
+            response['ETag'], self.etag('index', self.client)
+        )
+
+    def test_missing_objects_return_404(self):
+        """Несуществующие пост и профиль — по-прежнему 404"""
+        for url in (
+            reverse('posts:post_detail', args=[999]),
+            reverse('posts:profile', args=['nobody']),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.counters import get_user_counters
+from posts.models import Comment, Follow, Post, User, UserCounters
+
+
+class CountersTests(TestCase):
+    """Тестирование счётчиков"""
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='writer')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_posts_and_comments_are_counted(self):
+        """Создание и удаление постов и комментариев меняет счётчики"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(self.counters(self.author).posts_count, 2)
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.id}),
+            data={'text': 'Комментарий'}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        Comment.objects.get(post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 0)
+        post.delete()
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+
+    def test_follows_are_counted(self):
+        """Подписка и отписка меняют счётчики обоих пользователей"""
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.user).following_count, 1)
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(response.context['followers_count'], 1)
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(self.counters(self.author).followers_count, 0)
+        self.assertEqual(self.counters(self.user).following_count, 0)
+
+    def test_deleting_user_keeps_counters_consistent(self):
+        """Удаление пользователя не ломает счётчики других"""
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(author=self.author, text='Пост')
+        self.author.delete()
+        self.assertEqual(self.counters(self.user).following_count, 0)
+
+    def test_profile_does_not_write_counters(self):
+        """Профиль без строки счётчиков показывает нули и ничего не пишет"""
+        UserCounters.objects.filter(user=self.author).delete()
+        response = self.authorized_client.get(reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(response.context['posts_count'], 0)
+        self.assertFalse(
+            UserCounters.objects.filter(user=self.author).exists()
+        )
+
+    def test_counters_of_deleted_user(self):
+        """Для удалённого пользователя счётчиков нет: 404, а не запись"""
+        author = User.objects.get(pk=self.author.pk)
+        User.objects.filter(pk=author.pk).delete()
+        with self.assertRaises(Http404):
+            get_user_counters(author)
+        self.assertFalse(UserCounters.objects.filter(user=author).exists())
+
+    def test_recount_command(self):
+        """Команда recount_counters восстанавливает счётчики"""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Follow.objects.create(user=self.user, author=self.author)
+        Comment.objects.create(post=post, author=self.user, text='Текст')
+        UserCounters.objects.update(
+            posts_count=0, followers_count=0, following_count=0
+        )
+        Post.objects.update(comments_count=0)
+        UserCounters.objects.filter(user=self.user).delete()
+        call_command('recount_counters', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(self.counters(self.author).posts_count, 1)
+        self.assertEqual(self.counters(self.author).followers_count, 1)
+        self.assertEqual(self.counters(self.user).following_count, 1)
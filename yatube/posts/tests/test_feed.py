@@ -0,0 +1,101 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import FeedItem, Follow, Post, User
+
+
+class FeedTests(TestCase):
+    """Тестирование ленты подписок"""
+    def setUp(self):
+        self.user = User.objects.create_user(username='reader')
+        self.author = User.objects.create_user(username='writer')
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_follow_backfills_and_unfollow_trims_feed(self):
+        """Подписка добавляет старые посты в ленту, отписка убирает"""
+        Post.objects.create(author=self.author, text='Старый пост')
+        self.authorized_client.get(reverse(
+            'posts:profile_follow', kwargs={'username': self.author.username}
+        ))
+        self.assertEqual(FeedItem.objects.filter(user=self.user).count(), 1)
+        self.authorized_client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username}
+        ))
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост раскладывается по лентам подписчиков"""
+        Follow.objects.create(user=self.user, author=self.author)
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.post(
+            reverse('posts:post_create'), data={'text': 'Новый пост'}
+        )
+        post = Post.objects.get(text='Новый пост')
+        self.assertTrue(
+            FeedItem.objects.filter(user=self.user, post=post).exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post])
+
+    @mock.patch('posts.feed.FEED_FANOUT_LIMIT', 1)
+    def test_popular_author_posts_are_pulled(self):
+        """Посты популярного автора читаются напрямую и не дублируются"""
+        fan = User.objects.create_user(username='fan')
+        Follow.objects.create(user=fan, author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.bulk_create([
+            Post(author=self.author, text=f'Пост {i}') for i in range(12)
+        ])
+        own = User.objects.create_user(username='friend')
+        Follow.objects.create(user=self.user, author=own)
+        Post.objects.create(author=own, text='Пост друга')
+        self.assertFalse(
+            FeedItem.objects.filter(post__author=self.author).exists()
+        )
+        seen = []
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        seen.extend(response.context['page_obj'])
+        next_query = response.context['page_obj'].next_query
+        response = self.authorized_client.get(
+            reverse('posts:follow_index') + '?' + next_query
+        )
+        seen.extend(response.context['page_obj'])
+        self.assertEqual(len(seen), 13)
+        self.assertEqual(len({post.pk for post in seen}), 13)
+
+    @mock.patch('posts.feed.FEED_PULL_HYSTERESIS', 1)
+    @mock.patch('posts.feed.FEED_FANOUT_LIMIT', 2)
+    def test_author_leaving_pull_is_backfilled(self):
+        """С дочитывания автора возвращает команда, ниже запаса подписчиков"""
+        old = Post.objects.create(author=self.author, text='Старый пост')
+        fans = [
+            User.objects.create_user(username=f'fan{number}')
+            for number in range(2)
+        ]
+        Follow.objects.create(user=fans[0], author=self.author)
+        Follow.objects.create(user=fans[1], author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(author=self.author, text='Пост')
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        self.assertFalse(FeedItem.objects.filter(user=self.user).exists())
+        Follow.objects.get(user=fans[1]).delete()
+        call_command('release_pulled_authors', stdout=StringIO())
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        Follow.objects.get(user=fans[0]).delete()
+        self.assertFalse(FeedItem.objects.filter(post=post).exists())
+        call_command('release_pulled_authors', stdout=StringIO())
+        self.assertEqual(
+            set(FeedItem.objects.filter(user=self.user).values_list(
+                'post', flat=True
+            )),
+            {old.pk, post.pk}
+        )
+        self.assertFalse(FeedItem.objects.filter(user__in=fans).exists())
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(list(response.context['page_obj']), [post, old])
@@ -1,11 +1,22 @@
-from django.test import Client, TestCase
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import Client, RequestFactory, TestCase, override_settings
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopUpload
+from core.uploads import BoundedUploadHandler
 from posts.forms import PostForm
 from posts.models import Post, Group, User
+from posts.tests.utils import make_image
 from http import HTTPStatus
 
 
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostCreateFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -24,6 +35,11 @@ class PostCreateFormTests(TestCase):
         cls.form = PostForm()
         cls.posts_count = Post.objects.count()
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         self.guest_client = Client()
         self.user = User.objects.create_user(username='HasNoName')
@@ -59,8 +75,56 @@ class PostCreateFormTests(TestCase):
         self.assertEqual(Post.objects.count(), posts_count + 1)
         post = Post.objects.latest('id')
         self.assertEqual(post.text, form_data['text'])
+        self.assertTrue(post.image)
         self.assertContains(response, "<img")
 
+    @mock.patch('posts.forms.UPLOAD_MAX_BYTES', 10)
+    def test_large_file_is_rejected(self):
+        """Файл больше лимита отклоняется до декодирования"""
+        form = PostForm(
+            data={'text': 'Пост'}, files={'image': make_image()}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'file_too_large')
+
+    @mock.patch('posts.forms.POST_IMAGE_MAX_PIXELS', 100)
+    def test_large_resolution_is_rejected(self):
+        """Картинка с лишними пикселями отклоняется"""
+        form = PostForm(
+            data={'text': 'Пост'}, files={'image': make_image()}
+        )
+        self.assertFalse(form.is_valid())
+        self.assertEqual(form.errors.as_data()['image'][0].code,
+                         'too_many_pixels')
+
+    @mock.patch('core.uploads.UPLOAD_MAX_BYTES', 8)
+    def test_upload_handler_stops_at_limit(self):
+        """Сверх лимита разбор обрывается, а поле отмечается отклонённым"""
+        request = RequestFactory().post('/')
+        handler = BoundedUploadHandler(request)
+        handler.new_file('image', 'photo.png', 'image/png', None)
+        handler.receive_data_chunk(b'12345', 0)
+        with self.assertRaises(StopUpload) as stop:
+            handler.receive_data_chunk(b'67890', 5)
+        self.assertTrue(stop.exception.connection_reset)
+        self.assertEqual(handler.file.tell(), 5)
+        self.assertEqual(request.rejected_uploads, ['image'])
+
+    @mock.patch('core.uploads.UPLOAD_MAX_BYTES', 10)
+    def test_large_upload_shows_form_error(self):
+        """Оборванная загрузка — ошибка формы, а не пост без картинки"""
+        posts_count = Post.objects.count()
+        response = self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост', 'image': make_image()}
+        )
+        self.assertEqual(Post.objects.count(), posts_count)
+        self.assertEqual(
+            response.context['form'].errors.as_data()['image'][0].code,
+            'file_too_large'
+        )
+
     def test_post_edit(self):
         """Валидная форма редактирует запись (текст и группу) в Post"""
         self.post = Post.objects.create(
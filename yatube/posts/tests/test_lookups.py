@@ -0,0 +1,124 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import Http404
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.lookups import CachedLookup, LocalCache, groups, users
+from posts.models import Group, Post, User
+
+
+class LocalCacheTests(TestCase):
+    """Тестирование LRU процесса"""
+    def test_lru_and_ttl(self):
+        """Вытесняется давно не читанная запись, просроченная не отдаётся"""
+        local = LocalCache(size=2, ttl=10)
+        with mock.patch('posts.lookups.time.monotonic', return_value=0):
+            local.set('a', 1)
+            local.set('b', 2)
+            local.get('a')
+            local.set('c', 3)
+        with mock.patch('posts.lookups.time.monotonic', return_value=5):
+            self.assertEqual(local.get('a'), 1)
+            self.assertIsNone(local.get('b'))
+        with mock.patch('posts.lookups.time.monotonic', return_value=11):
+            self.assertIsNone(local.get('c'))
+
+
+class CachedLookupTests(TestCase):
+    """Тестирование поиска групп и авторов через кеш"""
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(title='Группа', slug='group')
+        self.author = User.objects.create_user(
+            username='writer', first_name='Лев', last_name='Толстой'
+        )
+
+    def test_tiers(self):
+        """Промах идёт в базу, затем в LRU, после сброса LRU — в общий кеш"""
+        before = groups.stats()
+        with self.assertNumQueries(1):
+            self.assertEqual(groups.get('group'), self.group)
+        with self.assertNumQueries(0):
+            groups.get('group')
+        groups.local.clear()
+        with self.assertNumQueries(0):
+            groups.get('group')
+        after = groups.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+        self.assertEqual(after['shared_hits'] - before['shared_hits'], 1)
+
+    def test_signals_invalidate(self):
+        """Правка и удаление сбрасывают оба уровня, включая старый slug"""
+        groups.get('group')
+        self.group.title = 'Новое название'
+        self.group.save()
+        self.assertEqual(groups.get('group').title, 'Новое название')
+        self.group.slug = 'renamed'
+        self.group.save()
+        self.assertIsNone(groups.get('group'))
+        self.group.delete()
+        self.assertIsNone(groups.get('renamed'))
+
+    def test_delete_reaches_other_processes(self):
+        """Удаление видно и LRU другого процесса, не дожидаясь срока"""
+        other = CachedLookup('group', Group.objects.all(), 'slug')
+        self.assertEqual(groups.get('group'), self.group)
+        self.assertEqual(other.get('group'), self.group)
+        self.group.delete()
+        self.assertIsNone(other.get('group'))
+        with self.assertRaises(Http404):
+            other.get_or_404('group')
+
+    def test_user_lookup_skips_password(self):
+        """Из пользователя кешируются только имена"""
+        author = users.get('writer')
+        self.assertEqual(author.get_full_name(), 'Лев Толстой')
+        self.assertIn('password', author.get_deferred_fields())
+        self.author.last_login = None
+        self.author.save(update_fields=['last_login'])
+        self.author.first_name = 'Алексей'
+        self.author.save()
+        self.assertEqual(users.get('writer').first_name, 'Алексей')
+        with self.assertRaises(Http404):
+            users.get_or_404('nobody')
+
+    def test_views_use_lookups(self):
+        """Страницы группы и профиля находят объекты без запроса к базе"""
+        client = Client()
+        client.get(reverse('posts:group_posts', args=['group']))
+        client.get(reverse('posts:profile', args=['writer']))
+        before = {'group': groups.stats(), 'user': users.stats()}
+        client.get(reverse('posts:group_posts', args=['group']) + '?x=1')
+        client.get(reverse('posts:profile', args=['writer']) + '?x=1')
+        self.assertGreater(
+            groups.stats()['local_hits'], before['group']['local_hits']
+        )
+        self.assertGreater(
+            users.stats()['local_hits'], before['user']['local_hits']
+        )
+
+    def test_lookup_returns_copies(self):
+        """Каждый поиск отдаёт свой экземпляр"""
+        first = users.get('writer')
+        self.assertIsNot(users.get('writer'), first)
+        self.assertEqual(users.get('writer'), first)
+
+    def test_profile_counters_are_fresh(self):
+        """Профиль из кеша показывает новые подписки и посты"""
+        client = Client()
+        url = reverse('posts:profile', args=['writer'])
+        response = client.get(url)
+        self.assertEqual(response.context['followers_count'], 0)
+        reader = User.objects.create_user(username='reader')
+        reader_client = Client()
+        reader_client.force_login(reader)
+        reader_client.get(
+            reverse('posts:profile_follow', args=['writer'])
+        )
+        Post.objects.create(author=self.author, text='Новый пост')
+        response = client.get(url)
+        self.assertEqual(response.context['followers_count'], 1)
+        self.assertEqual(response.context['posts_count'], 1)
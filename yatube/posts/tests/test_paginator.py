@@ -1,7 +1,10 @@
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
-from posts.models import Post, Group, User
+from posts.models import Comment, Post, Group, User
 from yatube.settings import POSTS_PER_PAGE
 
 
@@ -11,6 +14,7 @@ User = get_user_model()
 class PaginatorViewsTest(TestCase):
     """Тестирование Paginator"""
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username='auth')
         self.authorized_client = Client()
@@ -37,3 +41,93 @@ class PaginatorViewsTest(TestCase):
         response = self.client.get(reverse('posts:index') + '?page=2')
         expected = len(response.context['page_obj'][:3])
         self.assertEqual(len(response.context['page_obj']), expected)
+
+    def test_cursor_pages_walk_whole_feed(self):
+        """Курсорные ссылки проходят ленту без пропусков и повторов."""
+        response = self.client.get(reverse('posts:index'))
+        first_page = list(response.context['page_obj'])
+        next_query = response.context['page_obj'].next_query
+        self.assertEqual(len(first_page), POSTS_PER_PAGE)
+        response = self.client.get(reverse('posts:index') + '?' + next_query)
+        page_obj = response.context['page_obj']
+        second_page = list(page_obj)
+        self.assertEqual(len(second_page), 3)
+        self.assertFalse(page_obj.has_next)
+        self.assertEqual(
+            {post.pk for post in first_page + second_page},
+            set(Post.objects.values_list('pk', flat=True))
+        )
+        response = self.client.get(
+            reverse('posts:index') + '?' + page_obj.previous_query
+        )
+        self.assertEqual(list(response.context['page_obj']), first_page)
+
+    def test_cursor_pages_in_group_and_profile(self):
+        """Курсор работает в ленте группы и профиля."""
+        urls = (
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                next_query = response.context['page_obj'].next_query
+                response = self.client.get(url + '?' + next_query)
+                self.assertEqual(len(response.context['page_obj']), 3)
+
+    def test_broken_cursor_shows_first_page(self):
+        """Битый курсор открывает первую страницу."""
+        response = self.client.get(reverse('posts:index') + '?after=broken')
+        self.assertEqual(len(response.context['page_obj']), POSTS_PER_PAGE)
+
+
+class CommentPaginationTest(TestCase):
+    """Тестирование постраничной подгрузки комментариев"""
+    def setUp(self):
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(text='Пост', author=self.user)
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.user, text=f'Комментарий {i}')
+            for i in range(5)
+        )
+        self.detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+        self.fragment_url = reverse(
+            'posts:post_comments', kwargs={'post_id': self.post.id}
+        )
+
+    def texts(self, page):
+        return [comment.text for comment in page]
+
+    @mock.patch('posts.views.COMMENTS_PER_PAGE', 2)
+    def test_comments_are_loaded_in_batches(self):
+        """Пост показывает первую пачку, фрагмент отдаёт следующие"""
+        response = self.client.get(self.detail_url)
+        page = response.context['comments']
+        self.assertEqual(
+            self.texts(page), ['Комментарий 4', 'Комментарий 3']
+        )
+        self.assertContains(response, 'data-comments-more')
+        seen = self.texts(page)
+        url = f'{self.fragment_url}?{page.next_query}'
+        while url:
+            response = self.client.get(url)
+            self.assertTemplateUsed(
+                response, 'posts/includes/comment_list.html'
+            )
+            self.assertNotContains(response, '<html')
+            page = response.context['comments']
+            seen.extend(self.texts(page))
+            url = page.has_next and f'{self.fragment_url}?{page.next_query}'
+        self.assertEqual(
+            seen, [f'Комментарий {i}' for i in reversed(range(5))]
+        )
+        self.assertNotContains(response, 'data-comments-more')
+
+    def test_fragment_for_missing_post(self):
+        """Фрагмент несуществующего поста — 404"""
+        response = self.client.get(
+            reverse('posts:post_comments', kwargs={'post_id': 999})
+        )
+        self.assertEqual(response.status_code, 404)
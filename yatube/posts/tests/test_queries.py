@@ -0,0 +1,133 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from core.queries import (
+    QueryBudgetExceeded, QueryBudgetTestMixin, QueryRecorder, check_budget,
+    query_shape
+)
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class QueryBudgetTests(QueryBudgetTestMixin, TestCase):
+    """Тестирование числа запросов представлений"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.user = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(4)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+            for i in range(3):
+                cls.post = Post.objects.create(
+                    author=author, text=f'Пост {i}', group=cls.group
+                )
+                for commenter in cls.authors:
+                    Comment.objects.create(
+                        post=cls.post, author=commenter, text='Комментарий'
+                    )
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_pages_have_no_repeated_queries(self):
+        """Страницы не делают запросов на каждую запись"""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:follow_index'),
+            reverse('posts:group_posts', kwargs={'slug': self.group.slug}),
+            reverse(
+                'posts:profile', kwargs={'username': self.authors[0].username}
+            ),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.id}),
+            reverse('posts:post_comments', kwargs={'post_id': self.post.id}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoRepeatedQueries(
+                    self.authorized_client.get, url
+                )
+
+    def test_budget_is_enforced(self):
+        """Превышение бюджета в тестах — ошибка"""
+        with QueryRecorder() as recorder:
+            list(User.objects.all())
+            list(Group.objects.all())
+        check_budget('test', recorder, 2)
+        with self.assertRaises(QueryBudgetExceeded):
+            check_budget('test', recorder, 1)
+
+    def test_query_shape(self):
+        """Форма запроса не зависит от значений"""
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s) AND a = 'x'"),
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND a = 'y'")
+        )
+
+
+class QueryPlanTests(QueryBudgetTestMixin, TestCase):
+    """Тестирование индексов под запросы лент"""
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='writer')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+
+    def page(self, queryset, ordering):
+        return queryset.order_by(*ordering)[:11]
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты автора, группы и комментарии читаются по индексу"""
+        cases = (
+            (
+                Post.objects.filter(author=self.author),
+                ('-pub_date', '-id'),
+                'post_author_pub_date_idx',
+            ),
+            (
+                Post.objects.filter(group=self.group),
+                ('-pub_date', '-id'),
+                'post_group_pub_date_idx',
+            ),
+            (
+                Comment.objects.filter(post=self.post),
+                ('-created', '-id'),
+                'comment_post_created_idx',
+            ),
+            (
+                Follow.objects.filter(author=self.author).values('user'),
+                ('user',),
+                'follow_author_user_idx',
+            ),
+        )
+        for queryset, ordering, index in cases:
+            with self.subTest(index=index):
+                self.assertUsesIndex(self.page(queryset, ordering), index)
+
+    def test_missing_index_is_reported(self):
+        """Сортировка без индекса проваливает проверку"""
+        with self.assertRaises(AssertionError):
+            self.assertUsesIndex(
+                self.page(Post.objects.filter(author=self.author), ('text',)),
+                'post_author_pub_date_idx'
+            )
+
+    def test_explain_views_command(self):
+        """Команда печатает план каждого запроса страниц"""
+        out = StringIO()
+        call_command('explain_views', stdout=out)
+        self.assertIn('post_author_pub_date_idx', out.getvalue())
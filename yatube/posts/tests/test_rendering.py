@@ -0,0 +1,78 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Comment, Post, User
+from yatube.settings import TEXT_EXCERPT_LENGTH
+
+
+class RenderedTextTests(TestCase):
+    """Тестирование сохранённого HTML и начала текста"""
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user, text='Первая <b>строка</b>\nвторая строка'
+        )
+
+    def test_html_is_rendered_on_save(self):
+        """HTML экранирован, переносы строк — <br>"""
+        self.assertEqual(
+            self.post.text_html,
+            'Первая &lt;b&gt;строка&lt;/b&gt;<br>вторая строка'
+        )
+        self.assertEqual(
+            self.post.excerpt, 'Первая <b>строка</b> вторая строка'
+        )
+
+    def test_excerpt_is_truncated(self):
+        """Начало текста не длиннее TEXT_EXCERPT_LENGTH"""
+        post = Post.objects.create(author=self.user, text='слово ' * 100)
+        self.assertEqual(len(post.excerpt), TEXT_EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith('…'))
+
+    def test_update_fields_rerender(self):
+        """Сохранение только текста обновляет и HTML"""
+        self.post.text = 'Новый текст'
+        self.post.save(update_fields=['text'])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'Новый текст')
+        self.assertEqual(self.post.excerpt, 'Новый текст')
+
+    def test_comment_html(self):
+        """Комментарий тоже хранит HTML"""
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='a\nb'
+        )
+        self.assertEqual(comment.text_html, 'a<br>b')
+
+    def test_feed_loads_only_excerpt(self):
+        """Лента не загружает полный текст"""
+        response = self.guest_client.get(reverse('posts:index'))
+        post = response.context['page_obj'][0]
+        self.assertIn('text', post.get_deferred_fields())
+        self.assertIn('text_html', post.get_deferred_fields())
+        self.assertContains(
+            response, 'Первая &lt;b&gt;строка&lt;/b&gt; вторая строка'
+        )
+
+    def test_detail_uses_html(self):
+        """Страница поста выводит сохранённый HTML"""
+        response = self.guest_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertIn('text', response.context['post'].get_deferred_fields())
+        self.assertContains(response, self.post.text_html)
+
+    def test_backfill_command(self):
+        """Команда заполняет строки, записанные в обход save()"""
+        Post.objects.update(text_html='', excerpt='')
+        out = StringIO()
+        call_command('render_texts', stdout=out)
+        self.post.refresh_from_db()
+        self.assertIn('<br>', self.post.text_html)
+        self.assertTrue(self.post.excerpt)
+        self.assertIn('Посты: 1', out.getvalue())
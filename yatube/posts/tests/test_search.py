@@ -0,0 +1,94 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import Client, TestCase
+from django.urls import reverse
+from posts.models import Post, User
+from posts.search import get_search_backend
+from yatube.settings import POSTS_PER_PAGE
+
+
+class SearchTests(TestCase):
+    """Тестирование полнотекстового поиска"""
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user, text='Кошки любят молоко'
+        )
+        Post.objects.create(author=self.user, text='Собаки любят кости')
+
+    def search(self, query, **params):
+        return self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+
+    def test_search_finds_words_and_prefixes(self):
+        """Поиск находит посты по словам и их началу"""
+        response = self.search('кошк')
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+        response = self.search('любят')
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_search_ignores_query_syntax(self):
+        """Кавычки и операторы в запросе не ломают поиск"""
+        response = self.search('"кошки" AND (NEAR')
+        self.assertEqual(response.status_code, 200)
+
+    def test_index_follows_edits_and_deletes(self):
+        """Правка и удаление поста обновляют индекс"""
+        self.post.text = 'Попугаи любят зерно'
+        self.post.save()
+        self.assertEqual(len(self.search('кошки').context['page_obj']), 0)
+        self.assertEqual(len(self.search('попугаи').context['page_obj']), 1)
+        self.post.delete()
+        self.assertEqual(len(self.search('попугаи').context['page_obj']), 0)
+
+    def test_search_results_are_paginated(self):
+        """Выдача поиска делится на страницы"""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=f'Страница {i}')
+            for i in range(POSTS_PER_PAGE + 3)
+        ])
+        call_command('rebuild_search_index', stdout=StringIO())
+        page_obj = self.search('страница').context['page_obj']
+        self.assertEqual(len(page_obj), POSTS_PER_PAGE)
+        self.assertTrue(page_obj.has_next)
+        page_obj = self.search('страница', page=2).context['page_obj']
+        self.assertEqual(len(page_obj), 3)
+        self.assertFalse(page_obj.has_next)
+
+    def test_rebuild_restores_index(self):
+        """Команда rebuild_search_index восстанавливает индекс"""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {get_search_backend().table}')
+        self.assertEqual(len(self.search('кошки').context['page_obj']), 0)
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.search('кошки').context['page_obj']), 1)
+
+    def test_failed_rebuild_keeps_index(self):
+        """Сбой при пересборке не оставляет индекс пустым"""
+        def fail_insert(execute, sql, params, many, context):
+            if sql.startswith('INSERT'):
+                raise DatabaseError('Сбой вставки')
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(fail_insert):
+            with self.assertRaises(DatabaseError):
+                get_search_backend().rebuild()
+        self.assertEqual(len(self.search('кошки').context['page_obj']), 1)
+
+    def test_admin_uses_index(self):
+        """Поиск в админке идёт по индексу"""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.post]
+        )
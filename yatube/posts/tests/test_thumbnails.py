@@ -0,0 +1,117 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from posts.models import Post, User
+from posts.images import normalize_image
+from posts.thumbnails import generate_thumbnails
+from posts.tests.utils import make_image
+
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    """Тестирование фоновой подготовки миниатюр"""
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username='auth')
+        self.post = Post.objects.create(
+            author=self.user, text='Пост с картинкой', image=make_image()
+        )
+        self.url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.id}
+        )
+
+    def test_placeholder_until_ready(self):
+        """Пока миниатюра не готова, показывается заглушка"""
+        self.assertFalse(self.post.thumbnails_ready)
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, 'img/placeholder.svg')
+
+    def test_generated_thumbnail_is_rendered(self):
+        """После обработки страница показывает миниатюру"""
+        self.assertTrue(generate_thumbnails(self.post.pk))
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.thumbnails_ready)
+        response = self.guest_client.get(self.url)
+        self.assertNotContains(response, 'img/placeholder.svg')
+        self.assertContains(response, 'width="960"')
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'width="960"')
+        self.assertContains(response, 'loading="lazy"')
+
+    def test_picture_has_modern_formats(self):
+        """Картинка выводится в <picture> с AVIF, WebP и srcset"""
+        generate_thumbnails(self.post.pk)
+        response = self.guest_client.get(self.url)
+        self.assertContains(response, '<picture>')
+        self.assertContains(response, 'type="image/avif"')
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '.avif 480w')
+        self.assertContains(response, '.webp 1440w')
+        self.assertContains(response, '.jpg 960w')
+        self.assertNotContains(response, 'loading="lazy"')
+
+    def test_page_never_generates_variants(self):
+        """Страница не готовит миниатюры и укладывается в бюджет"""
+        Post.objects.filter(pk=self.post.pk).update(thumbnails_ready=True)
+        with mock.patch(
+            'posts.thumbnails.get_thumbnail', side_effect=AssertionError
+        ):
+            response = self.guest_client.get(self.url)
+            self.assertContains(response, 'img/placeholder.svg')
+        generate_thumbnails(self.post.pk)
+        cache.clear()
+        with mock.patch(
+            'posts.thumbnails.get_thumbnail', side_effect=AssertionError
+        ):
+            response = self.guest_client.get(self.url)
+        self.assertContains(response, 'type="image/avif"')
+
+    def test_new_image_resets_ready_flag(self):
+        """Новая картинка снова ставит пост в очередь"""
+        generate_thumbnails(self.post.pk)
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Только текст'
+        post.save()
+        self.assertTrue(post.thumbnails_ready)
+        post.image = make_image('other.png')
+        post.save()
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
+        self.assertEqual(post.image_variants, '')
+
+
+class NormalizeImageTests(TestCase):
+    """Тестирование обработки оригиналов"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'photo.jpg')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_large_photo_is_downscaled_and_stripped(self):
+        """Снимок уменьшается, метаданные удаляются"""
+        image = Image.new('RGB', (400, 300), 'blue')
+        exif = image.getexif()
+        exif[0x010f] = 'Phone'
+        image.save(self.path, 'JPEG', exif=exif.tobytes())
+        self.assertTrue(normalize_image(self.path, 100, 85))
+        with Image.open(self.path) as result:
+            self.assertEqual(result.size, (100, 75))
+            self.assertFalse(result.getexif())
+        self.assertFalse(normalize_image(self.path, 100, 85))
@@ -0,0 +1,214 @@
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from django.db import close_old_connections, connections, transaction
+from PIL import features
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.base import ThumbnailBackend as BaseThumbnailBackend
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import serialize, tokey
+
+from .cache import bump_version
+from .images import normalize_image
+from .models import Post
+from core.db.router import use_primary
+from yatube.settings import (
+    POST_IMAGE_FORMATS, POST_IMAGE_MAX_SIDE, POST_IMAGE_OPTIONS,
+    POST_IMAGE_PROCESSES, POST_IMAGE_QUALITY, POST_IMAGE_RATIO,
+    POST_IMAGE_WIDTHS, POST_THUMBNAIL_WORKERS
+)
+
+
+logger = logging.getLogger('posts.thumbnails')
+
+MIME_TYPES = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+}
+
+_executor = None
+_processes = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=POST_THUMBNAIL_WORKERS,
+            thread_name_prefix='thumbnails'
+        )
+    return _executor
+
+
+def get_process_pool():
+    """Процессы для декодирования оригиналов.
+
+    Запускаются через spawn: рабочему процессу не нужны ни Django,
+    ни унаследованные соединения с базой.
+    """
+    global _processes
+    if _processes is None:
+        _processes = ProcessPoolExecutor(
+            max_workers=POST_IMAGE_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _processes
+
+
+def normalize_post_image(post):
+    """Уменьшает оригинал картинки и убирает метаданные в рабочем процессе."""
+    try:
+        path = post.image.path
+    except NotImplementedError:
+        return False
+    return get_process_pool().submit(
+        normalize_image, path, POST_IMAGE_MAX_SIDE, POST_IMAGE_QUALITY
+    ).result()
+
+
+class ThumbnailBackend(BaseThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который знает расширение файлов AVIF."""
+
+    def _get_thumbnail_filename(self, source, geometry_string, options):
+        if options['format'] != 'AVIF':
+            return super()._get_thumbnail_filename(
+                source, geometry_string, options
+            )
+        key = tokey(source.key, geometry_string, serialize(options))
+        return (
+            f'{thumbnail_settings.THUMBNAIL_PREFIX}'
+            f'{key[:2]}/{key[2:4]}/{key}.avif'
+        )
+
+
+@lru_cache(maxsize=None)
+def _can_write(image_format):
+    if image_format == 'JPEG':
+        return True
+    try:
+        return features.check(image_format.lower())
+    except ValueError:
+        return False
+
+
+def image_formats():
+    """Форматы POST_IMAGE_FORMATS, которые умеет записывать Pillow."""
+    return [
+        (image_format, quality)
+        for image_format, quality in POST_IMAGE_FORMATS
+        if _can_write(image_format)
+    ]
+
+
+def variant_geometry(width):
+    ratio_width, ratio_height = POST_IMAGE_RATIO
+    return f'{width}x{round(width * ratio_height / ratio_width)}'
+
+
+def post_variants():
+    """Все варианты картинки поста: (формат, геометрия, опции)."""
+    for image_format, quality in image_formats():
+        options = {
+            **POST_IMAGE_OPTIONS, 'format': image_format, 'quality': quality
+        }
+        for width in POST_IMAGE_WIDTHS:
+            yield image_format, variant_geometry(width), options
+
+
+def generate_thumbnails(post_id):
+    """Готовит все варианты картинки поста по ширине и формату.
+
+    Флаг готовности ставится, только если картинка не сменилась,
+    пока шла обработка.
+    """
+    post = Post.objects.filter(pk=post_id).only('id', 'image').first()
+    if post is None or not post.image:
+        return False
+    variants = []
+    for image_format, geometry, options in post_variants():
+        image = get_thumbnail(post.image, geometry, **options)
+        variants.append({
+            'format': image_format,
+            'name': image.name,
+            'width': image.width,
+            'height': image.height,
+        })
+    ready = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails_ready=True, image_variants=json.dumps(variants)
+    )
+    if ready:
+        bump_version('index')
+    return bool(ready)
+
+
+def process_post(post_id):
+    """Обработка поста в рабочем потоке со своим соединением с базой.
+
+    Пост только что записан, и реплика может его ещё не видеть.
+    """
+    close_old_connections()
+    try:
+        with use_primary():
+            post = Post.objects.filter(pk=post_id).only(
+                'id', 'image', 'thumbnails_ready'
+            ).first()
+            if post and post.image and not post.thumbnails_ready:
+                normalize_post_image(post)
+            return generate_thumbnails(post_id)
+    except Exception:
+        logger.exception('Не удалось подготовить миниатюры поста %s', post_id)
+        return False
+    finally:
+        connections.close_all()
+
+
+def schedule_thumbnails(post_id):
+    """Ставит пост в очередь обработки после фиксации транзакции."""
+    transaction.on_commit(
+        lambda: get_executor().submit(process_post, post_id)
+    )
+
+
+def get_post_picture(post):
+    """Варианты картинки для <picture> или None, пока их нет.
+
+    Читает только сохранённые в посте варианты и ничего не
+    генерирует: на запросе нет ни кодирования, ни обращений к
+    хранилищу миниатюр sorl. Форматы идут от самого лёгкого;
+    последний становится <img> для браузеров без <picture>.
+    """
+    if not post.image or not post.thumbnails_ready or not post.image_variants:
+        return None
+    sources = {}
+    for variant in json.loads(post.image_variants):
+        sources.setdefault(variant['format'], []).append({
+            'url': default.storage.url(variant['name']),
+            'width': variant['width'],
+            'height': variant['height'],
+        })
+    srcsets = [
+        {
+            'type': MIME_TYPES[image_format],
+            'srcset': ', '.join(
+                f'{image["url"]} {image["width"]}w' for image in images
+            ),
+        }
+        for image_format, images in sources.items()
+    ]
+    fallback = list(sources.values())[-1]
+    img = next(
+        (
+            image for image in fallback
+            if image['width'] == POST_IMAGE_RATIO[0]
+        ),
+        fallback[-1]
+    )
+    return {
+        'sources': srcsets[:-1],
+        'img': img,
+        'srcset': srcsets[-1]['srcset'],
+    }
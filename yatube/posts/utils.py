@@ -1,7 +1,289 @@
+import base64
+import binascii
+import heapq
+import json
+
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from yatube.settings import (
+    PAGE_NUMBER_LIMIT, PAGE_RANGE_ON_EACH_SIDE, PAGE_RANGE_ON_ENDS
+)
+
+
+CURSOR_KEYS = ('pub_date', 'id')
+COMMENT_KEYS = ('created', 'id')
+
+
+def encode_cursor(values):
+    """Упаковывает значения ключа сортировки в непрозрачный токен."""
+    raw = json.dumps([str(value) for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, queryset, keys):
+    """Распаковывает токен курсора. Для битого токена возвращает None."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if len(values) != len(keys):
+            return None
+        return tuple(
+            _key_field(queryset, key).to_python(value)
+            for key, value in zip(keys, values)
+        )
+    except (ValueError, TypeError, binascii.Error, ValidationError):
+        return None
+
+
+def _key_field(queryset, key):
+    annotation = queryset.query.annotations.get(key)
+    if annotation is not None:
+        return annotation.output_field
+    return queryset.model._meta.get_field(key)
+
+
+def _cursor_filter(keys, values, lookup):
+    """Условие «строго после курсора» для пары ключей (дата, id).
+
+    Избыточное `date <= value` позволяет базе начать с диапазона по индексу,
+    а не перебирать всё с начала ленты.
+    """
+    date_key, id_key = keys
+    date_value, id_value = values
+    return (
+        Q(**{f'{date_key}__{lookup}e': date_value})
+        & (
+            Q(**{f'{date_key}__{lookup}': date_value})
+            | Q(**{date_key: date_value, f'{id_key}__{lookup}': id_value})
+        )
+    )
+
+
+class CursorPage:
+    """Страница ленты, выбранная по курсору вместо OFFSET.
+
+    Запрос выполняется лениво, при первом обращении к записям страницы,
+    и не требует `SELECT COUNT(*)`.
+    """
+
+    def __init__(self, request, querysets, per_page, keys=CURSOR_KEYS):
+        self.request = request
+        self.querysets = querysets
+        self.per_page = per_page
+        self.keys = keys
+        self.after = self._read_cursor('after')
+        self.before = None if self.after else self._read_cursor('before')
+        self._object_list = None
+
+    def _read_cursor(self, name):
+        token = self.request.GET.get(name)
+        if not token:
+            return None
+        return decode_cursor(token, self.querysets[0], self.keys)
+
+    def _key(self, obj):
+        return tuple(getattr(obj, key) for key in self.keys)
+
+    def _select(self, cursor, lookup, descending, limit):
+        """Выбирает limit записей после курсора из всех источников.
+
+        Источники с одинаковыми ключами сливаются по порядку ключа,
+        повторяющиеся записи пропускаются.
+        """
+        prefix = '-' if descending else ''
+        ordering = [prefix + key for key in self.keys]
+        parts = []
+        for queryset in self.querysets:
+            if cursor:
+                queryset = queryset.filter(
+                    _cursor_filter(self.keys, cursor, lookup)
+                )
+            parts.append(list(queryset.order_by(*ordering)[:limit]))
+        if len(parts) == 1:
+            return parts[0]
+        rows = []
+        for obj in heapq.merge(*parts, key=self._key, reverse=descending):
+            if not rows or self._key(rows[-1]) != self._key(obj):
+                rows.append(obj)
+        return rows[:limit]
+
+    def _fetch(self):
+        limit = self.per_page + 1
+        if self.before:
+            rows = self._select(self.before, 'gt', False, limit)
+            self.has_previous = len(rows) > self.per_page
+            self.has_next = True
+            return rows[:self.per_page][::-1]
+        rows = self._select(self.after, 'lt', True, limit)
+        self.has_previous = self.after is not None
+        self.has_next = len(rows) > self.per_page
+        return rows[:self.per_page]
+
+    @property
+    def object_list(self):
+        if self._object_list is None:
+            self._object_list = self._fetch()
+        return self._object_list
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __repr__(self):
+        model = self.querysets[0].model.__name__
+        return f'<CursorPage {len(self)} of {model}>'
+
+    def has_other_pages(self):
+        if self._object_list is None:
+            self._object_list = self._fetch()
+        return self.has_previous or self.has_next
 
+    def _cursor(self, obj):
+        return encode_cursor(self._key(obj))
 
-def get_paginator(request, posts, POSTS_PER_PAGE):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
+    def _query(self, **params):
+        query = self.request.GET.copy()
+        for name in ('page', 'after', 'before'):
+            query.pop(name, None)
+        query.update(params)
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        return self._query()
+
+    @property
+    def next_query(self):
+        if not self.has_other_pages() or not self.has_next:
+            return None
+        return self._query(after=self._cursor(self.object_list[-1]))
+
+    @property
+    def previous_query(self):
+        if not self.has_other_pages() or not self.has_previous:
+            return None
+        return self._query(before=self._cursor(self.object_list[0]))
+
+
+class OffsetPage:
+    """Страница выдачи, где порядок задаёт не дата, а, например, ранг.
+
+    Берёт per_page + 1 записей через fetch(offset, limit), чтобы узнать
+    о следующей странице без подсчёта всех результатов.
+    """
+
+    def __init__(self, request, fetch, per_page):
+        self.request = request
+        try:
+            number = int(request.GET.get('page', 1))
+        except ValueError:
+            number = 1
+        self.number = min(max(number, 1), PAGE_NUMBER_LIMIT)
+        rows = fetch((self.number - 1) * per_page, per_page + 1)
+        self.object_list = rows[:per_page]
+        self.has_previous = self.number > 1
+        self.has_next = (
+            len(rows) > per_page and self.number < PAGE_NUMBER_LIMIT
+        )
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    def _query(self, number):
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        if number > 1:
+            query['page'] = number
+        return query.urlencode()
+
+    @property
+    def first_query(self):
+        return self._query(1)
+
+    @property
+    def previous_query(self):
+        return self._query(self.number - 1)
+
+    @property
+    def next_query(self):
+        return self._query(self.number + 1)
+
+
+class CappedPaginator(Paginator):
+    """Paginator для старых ссылок `?page=N`.
+
+    Глубина ограничена PAGE_NUMBER_LIMIT, чтобы OFFSET не уходил
+    в конец большой таблицы; дальше листать можно по курсору.
+    """
+
+    @cached_property
+    def num_pages(self):
+        return min(Paginator.num_pages.func(self), PAGE_NUMBER_LIMIT)
+
+
+def elided_page_range(page, on_each_side=PAGE_RANGE_ON_EACH_SIDE,
+                      on_ends=PAGE_RANGE_ON_ENDS):
+    """Номера страниц вокруг текущей; пропуски обозначены None."""
+    number = page.number
+    num_pages = page.paginator.num_pages
+    if num_pages <= (on_each_side + on_ends) * 2:
+        return list(range(1, num_pages + 1))
+    if number > on_each_side + on_ends + 2:
+        pages = list(range(1, on_ends + 1))
+        pages.append(None)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages = list(range(1, number + 1))
+    if number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+def get_paginator(request, posts, POSTS_PER_PAGE, keys=CURSOR_KEYS,
+                  sources=None):
+    """Постраничный вывод ленты.
+
+    По умолчанию страницы выбираются по курсору `?after=`/`?before=`;
+    sources позволяет склеить ленту из нескольких запросов с общими keys.
+    Старые ссылки вида `?page=N` продолжают работать через Paginator.
+    """
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    cursor = 'after' in request.GET or 'before' in request.GET
+    if page_number is None or cursor:
+        return CursorPage(request, sources or [posts], POSTS_PER_PAGE, keys)
+    paginator = CappedPaginator(posts, POSTS_PER_PAGE)
+    page_obj = paginator.get_page(page_number)
+    page_obj.elided_page_range = elided_page_range(page_obj)
+    return page_obj
+
+
+def page_cache_key(page_obj):
+    """Ключ страницы для кеша фрагментов: только то, что выбрало записи.
+
+    Посторонние параметры запроса и битые курсоры не размножают
+    записи в кеше.
+    """
+    if isinstance(page_obj, CursorPage):
+        return f'after={page_obj.after}&before={page_obj.before}'
+    return f'page={page_obj.number}'
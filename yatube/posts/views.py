@@ -1,29 +1,56 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.vary import vary_on_cookie
-from django.views.decorators.cache import cache_page
-from .models import Post, Group, Follow, User
+from django.db import transaction
+from .models import Comment, Post, Follow
+from .cache import get_version
+from .conditional import (
+    conditional_page, feed_etag, group_etag, index_etag, post_etag,
+    profile_etag
+)
+from .counters import get_user_counters
+from .feed import FEED_KEYS, get_feed_sources
 from .forms import PostForm, CommentForm
-from .utils import get_paginator
-from yatube.settings import POSTS_PER_PAGE
-
-
-@cache_page(20, key_prefix='index_page')
-@vary_on_cookie
+from .lookups import groups, users
+from .rendering import DETAIL_DEFERRED, FEED_DEFERRED
+from .search import search_posts
+from .utils import (
+    COMMENT_KEYS, CursorPage, OffsetPage, get_paginator, page_cache_key
+)
+from core.queries import query_budget
+from yatube.settings import (
+    COMMENTS_PER_PAGE, INDEX_CACHE_TIMEOUT, POSTS_PER_PAGE
+)
+
+
+@query_budget(4)
+@conditional_page(index_etag)
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    )
     page_obj = get_paginator(request, posts, POSTS_PER_PAGE)
     context = {
         'posts': posts,
         'page_obj': page_obj,
+        'index_version': get_version('index'),
+        'index_cache_timeout': INDEX_CACHE_TIMEOUT,
+        'page_key': page_cache_key(page_obj),
     }
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(5)
 @login_required
+@conditional_page(feed_etag)
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
-    page_obj = get_paginator(request, posts, POSTS_PER_PAGE)
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    ).filter(author__following__user=request.user)
+    page_obj = get_paginator(
+        request, posts, POSTS_PER_PAGE,
+        keys=FEED_KEYS,
+        sources=get_feed_sources(request.user)
+    )
     context = {
         'posts': posts,
         'page_obj': page_obj,
@@ -31,9 +58,28 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(4)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = OffsetPage(
+        request,
+        lambda offset, limit: search_posts(query, offset, limit),
+        POSTS_PER_PAGE
+    )
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@query_budget(5)
+@conditional_page(group_etag)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.filter(group=group).all()
+    group = groups.get_or_404(slug)
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    ).filter(group=group)
     page_obj = get_paginator(request, posts, POSTS_PER_PAGE)
     context = {
         'group': group,
@@ -43,57 +89,78 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(8)
+@conditional_page(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = Post.objects.filter(author=author).all()
+    author = users.get_or_404(username)
+    counters = get_user_counters(author)
+    posts = Post.objects.select_related('author', 'group').defer(
+        *FEED_DEFERRED
+    ).filter(author=author)
     user = request.user
     page_obj = get_paginator(request, posts, POSTS_PER_PAGE)
-    follow = Follow.objects.filter(
-        author=author,
-        user=user
-    )
     following = False
-    if follow.exists() and author != user:
-        following = True
+    if user.is_authenticated and author != user:
+        following = Follow.objects.filter(
+            author=author,
+            user=user
+        ).exists()
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'posts_count': counters.posts_count,
+        'followers_count': counters.followers_count,
+        'following_count': counters.following_count,
     }
     return render(request, 'posts/profile.html', context)
 
-@login_required
-def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    user = request.user
-    follow_obj = Follow.objects.filter(
-        author=author,
-        user=user
-    )
-    if not follow_obj.exists() and author != user:
-        Follow.objects.create(
-            author=author,
-            user=user
-        )
-        return redirect('posts:profile', username=author)
-    return redirect('posts:profile', username=author)
-
 
+@query_budget(5)
+@conditional_page(post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group').defer(
+            *DETAIL_DEFERRED
+        ),
+        pk=post_id
+    )
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
         'form': form,
-        'comments': comments,
+        'comments': get_comments_page(request, post.pk),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+@query_budget(4)
+def post_comments(request, post_id):
+    """Следующая пачка комментариев в виде фрагмента HTML."""
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = {
+        'post': post,
+        'comments': get_comments_page(request, post.pk),
+    }
+    return render(request, 'posts/includes/comment_list.html', context)
+
+
+def get_comments_page(request, post_id):
+    comments = Comment.objects.select_related('author').defer(
+        *DETAIL_DEFERRED
+    ).filter(post=post_id)
+    return CursorPage(request, [comments], COMMENTS_PER_PAGE, COMMENT_KEYS)
+
+
+@query_budget(14)
 @login_required
+@transaction.atomic
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        rejected=getattr(request, 'rejected_uploads', ())
+    )
     if not form.is_valid():
         return render(
             request,
@@ -106,6 +173,7 @@ def post_create(request):
     return redirect('posts:profile', post.author)
 
 
+@query_budget(10)
 @login_required
 def post_edit(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
@@ -115,7 +183,8 @@ def post_edit(request, post_id):
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        rejected=getattr(request, 'rejected_uploads', ())
     )
     if form.is_valid():
         form.save()
@@ -128,7 +197,9 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(8)
 @login_required
+@transaction.atomic
 def add_comment(request, post_id):
     post = get_object_or_404(Post, pk=post_id)
     form = CommentForm(request.POST or None)
@@ -140,9 +211,11 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(14)
 @login_required
+@transaction.atomic
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
+    author = users.get_or_404(username)
     user = request.user
     follow = Follow.objects.filter(
         author=author,
@@ -156,8 +229,10 @@ def profile_follow(request, username):
         return redirect('posts:profile', username=author)
     return redirect('posts:profile', username=author)
 
+@query_budget(12)
 @login_required
+@transaction.atomic
 def profile_unfollow(request, username):
-    user = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=user).delete()
+    author = users.get_or_404(username)
+    Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('posts:profile', username=username)
\ No newline at end of file
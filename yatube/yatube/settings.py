@@ -38,6 +38,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.StaticFilesMiddleware',
+    'core.middleware.TracingMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
+    'core.middleware.SlowLogMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -52,7 +58,8 @@ ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # Шаблоны Django с замером времени отрисовки для /metrics
+        'BACKEND': 'core.metrics.MetricsTemplates',
         # Добавлено: Искать шаблоны на уровне проекта
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
@@ -76,11 +83,33 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite с WAL и прагмами для нескольких процессов, см. core.db
+        'ENGINE': 'core.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики только для чтения. Чтение моделей DATABASE_REPLICA_MODELS
+# распределяет core.db.router. Для локальной проверки подойдёт копия
+# базы, которую обновляет `manage.py sync_replica`:
+#
+#     DATABASES['replica'] = {
+#         'ENGINE': 'core.db.sqlite3',
+#         'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+#         'TEST': {'MIRROR': 'default'},
+#     }
+#     DATABASE_REPLICAS = ['replica']
+DATABASE_REPLICAS = []
+DATABASE_REPLICA_MODELS = {
+    'posts.Post', 'posts.Comment', 'posts.Group', 'posts.Follow',
+    'posts.CacheVersion',
+}
+DATABASE_ROUTERS = ['core.db.router.ReplicaRouter']
+# После записи пользователь столько секунд читает с основной базы
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary_pin'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -116,6 +145,61 @@ USE_TZ = False
 
 POSTS_PER_PAGE = 10
 
+# Комментарии под постом: первая пачка и каждая подгрузка
+COMMENTS_PER_PAGE = 20
+# Лента показывает начало текста, сохранённое вместе с постом
+TEXT_EXCERPT_LENGTH = 300
+
+# Старые ссылки ?page=N: сколько номеров показывать и до какой глубины
+PAGE_RANGE_ON_EACH_SIDE = 2
+PAGE_RANGE_ON_ENDS = 1
+PAGE_NUMBER_LIMIT = 100
+
+# Лента подписок: посты авторов с большим числом подписчиков не
+# раскладываются по лентам, а дочитываются при чтении
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 500
+# Раскладка возвращается, когда подписчиков не больше FEED_FANOUT_LIMIT
+# минус этот запас: отписки и подписки у границы ничего не пересобирают.
+# Посты за время дочитывания раскладывает
+# `manage.py release_pulled_authors`, запускаемая по расписанию.
+FEED_PULL_HYSTERESIS = 50
+
+# Бюджеты SQL-запросов представлений: в тестах превышение — ошибка
+QUERY_BUDGET_STRICT = False
+QUERY_REPEAT_THRESHOLD = 3
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Главная страница кэшируется целиком до следующей записи в ленту
+INDEX_CACHE_TIMEOUT = 60 * 10
+
+# Полнотекстовый поиск: для баз без FTS5 — posts.search.SimpleSearchBackend
+POSTS_SEARCH_BACKEND = 'posts.search.SQLiteFTSBackend'
+POSTS_SEARCH_ADMIN_LIMIT = 1000
+
+# Миниатюры картинок постов готовятся в фоне после сохранения: каждая
+# ширина POST_IMAGE_WIDTHS с пропорциями POST_IMAGE_RATIO в каждом
+# формате. Форматы с качеством идут от самого лёгкого, последний —
+# запасной для <img>; форматы, которых не умеет Pillow, пропускаются
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_WIDTHS = (480, 960, 1440)
+POST_IMAGE_FORMATS = (('AVIF', 50), ('WEBP', 75), ('JPEG', 80))
+POST_IMAGE_OPTIONS = {'crop': 'center', 'upscale': True}
+# Ширина картинки на странице для выбора варианта браузером
+POST_IMAGE_SIZES = '(min-width: 992px) 960px, 100vw'
+POST_THUMBNAIL_WORKERS = 2
+THUMBNAIL_BACKEND = 'posts.thumbnails.ThumbnailBackend'
+
+# Загрузки пишутся на диск по частям и не больше UPLOAD_MAX_BYTES;
+# оригиналы уменьшаются до POST_IMAGE_MAX_SIDE в отдельных процессах
+FILE_UPLOAD_HANDLERS = ['core.uploads.BoundedUploadHandler']
+UPLOAD_MAX_BYTES = 50 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 50_000_000
+POST_IMAGE_MAX_SIDE = 2048
+POST_IMAGE_QUALITY = 85
+POST_IMAGE_PROCESSES = 2
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/2.2/howto/static-files/
@@ -123,6 +207,12 @@ POSTS_PER_PAGE = 10
 STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+
+# collectstatic пишет имена с хешем содержимого и сжатые копии .gz/.br;
+# StaticFilesMiddleware отдаёт их с кешированием на STATIC_MAX_AGE
+STATICFILES_STORAGE = 'core.staticfiles.CompressedManifestStaticFilesStorage'
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -135,9 +225,51 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media') 
-
+# Файлы из MEDIA_ROOT может отдавать веб-сервер: 'x-accel-redirect'
+# для nginx (internal location MEDIA_ACCEL_PREFIX с alias на MEDIA_ROOT)
+# или 'x-sendfile' для Apache и lighttpd; None — отдаёт Django
+MEDIA_SENDFILE = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+MEDIA_MAX_AGE = 60 * 60 * 24
+
+# Метрики Prometheus: файлы процессов и частота их записи
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 5
+# Пустой список открывает /metrics для всех
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Журнал медленных запросов: SQL, время, стек и шаблон каждого запроса.
+# Пишутся запросы медленнее порогов и доля SLOWLOG_SAMPLE_RATE остальных.
+# Каждый процесс пишет и ротирует свой файл: slow.<pid>.jsonl
+SLOWLOG_FILE = os.path.join(BASE_DIR, 'logs', 'slow.jsonl')
+SLOWLOG_REQUEST_SECONDS = 0.5
+SLOWLOG_QUERY_SECONDS = 0.1
+SLOWLOG_SAMPLE_RATE = 0.01
+SLOWLOG_MAX_BYTES = 10 * 1024 * 1024
+SLOWLOG_BACKUP_COUNT = 5
+
+# Трассы запросов в формате OTLP/JSON: доля TRACE_SAMPLE_RATE и все
+# запросы дольше TRACE_SLOW_SECONDS. Без TRACE_FILE трассировка выключена
+TRACE_FILE = os.path.join(BASE_DIR, 'logs', 'traces.jsonl')
+TRACE_SAMPLE_RATE = 0.01
+TRACE_SLOW_SECONDS = 1
+TRACE_MAX_BYTES = 50 * 1024 * 1024
+TRACE_BACKUP_COUNT = 5
+
+# Группы по slug и авторы по username: LRU процесса перед общим кешем.
+# Попадание в LRU сверяет версию записи в общем кеше
+LOOKUP_CACHE_SIZE = 1000
+LOOKUP_LOCAL_TTL = 30
+LOOKUP_SHARED_TIMEOUT = 60 * 60
+
+# Общий для всех процессов кеш в файле SQLite, см. core.cache.sqlite
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.sqlite.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 256 * 1024 * 1024,
+        },
     }
 } 